@@ -2,43 +2,173 @@
 import numpy as np
 from typing import List, Dict, Tuple
 import colorsys
+import functools
+import itertools
 import logging
 
+# Try to import Numba for the JIT-compiled harmony kernel
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Color tables are module-level constants built once at import and shared by
+# every ColorAnalyzer, so construction is free and analyzers pickle cheaply
+_COLOR_WHEEL = {
+    'red': (0, 100, 100),
+    'orange': (30, 100, 100),
+    'yellow': (60, 100, 100),
+    'green': (120, 100, 100),
+    'blue': (240, 100, 100),
+    'purple': (270, 100, 100),
+    'pink': (330, 100, 100),
+    'brown': (30, 100, 30),
+    'black': (0, 0, 0),
+    'white': (0, 0, 100),
+    'gray': (0, 0, 50),
+    'navy': (240, 100, 25),
+    'beige': (30, 30, 80)
+}
+
+_SEASONAL_PALETTES = {
+    'spring': ['coral', 'yellow', 'green', 'pink', 'light_blue'],
+    'summer': ['blue', 'purple', 'gray', 'white', 'soft_pink'],
+    'autumn': ['orange', 'brown', 'gold', 'deep_red', 'olive'],
+    'winter': ['black', 'white', 'red', 'navy', 'silver']
+}
+
+# Parallel arrays over the color wheel for vectorized hue scans
+_COLOR_NAMES = np.array(list(_COLOR_WHEEL.keys()))
+_HUES = np.array([hsv[0] for hsv in _COLOR_WHEEL.values()], dtype=np.int16)
+
+# Pairwise harmony lookup table. Complementary colors (180°) score 0.9,
+# analogous (<30°) 0.8, triadic (120°) 0.7 and everything else 0.5
+_d = np.abs(_HUES[:, None] - _HUES[None, :])
+_d = np.minimum(_d, 360 - _d)
+_HARMONY_LUT = np.where(np.abs(_d - 180) < 30, 0.9,
+               np.where(_d < 30, 0.8,
+               np.where(np.abs(_d - 120) < 30, 0.7, 0.5)))
+del _d
+
+# Small integer codes for every known color. Wheel colors take the
+# first codes, so a wheel color's code is also its index into _HUES
+_CODE_TO_NAME = list(dict.fromkeys(
+    itertools.chain(_COLOR_WHEEL, *_SEASONAL_PALETTES.values())
+))
+_NAME_TO_CODE = {name: code for code, name in enumerate(_CODE_TO_NAME)}
+
+
+def _code_mask(names: List[str]) -> np.ndarray:
+    """Boolean mask over color codes for the given color names"""
+    mask = np.zeros(len(_CODE_TO_NAME), dtype=bool)
+    mask[[_NAME_TO_CODE[name] for name in names]] = True
+    return mask
+
+
+# Rows: warm, cool, then one per season. Every per-color count the
+# analysis needs comes out of a single mat-vec over the code histogram
+_SEASONS = list(_SEASONAL_PALETTES)
+_SUMMARY_MAT = np.stack([
+    _code_mask(['red', 'orange', 'yellow', 'pink', 'brown']),
+    _code_mask(['blue', 'green', 'purple', 'gray']),
+    *(_code_mask(palette) for palette in _SEASONAL_PALETTES.values())
+]).astype(np.int64)
+
+
+def _circ_dist(target_hue: int) -> np.ndarray:
+    """Circular hue distance from every color on the wheel to a target hue"""
+    diff = np.abs(_HUES - target_hue) % 360
+    return np.minimum(diff, 360 - diff)
+
+
+def _complementary_colors(base_color: str) -> List[str]:
+    """Find complementary colors"""
+    base_hue = _COLOR_WHEEL[base_color][0]
+    complement_hue = (base_hue + 180) % 360
+    
+    # Find closest color names
+    mask = _circ_dist(complement_hue) < 30
+    return _COLOR_NAMES[mask].tolist()
+
+
+def _analogous_colors(base_color: str) -> List[str]:
+    """Find analogous colors"""
+    base_hue = _COLOR_WHEEL[base_color][0]
+    
+    mask = (_circ_dist(base_hue) < 60) & (_COLOR_NAMES != base_color)
+    return _COLOR_NAMES[mask].tolist()
+
+
+def _triadic_colors(base_color: str) -> List[str]:
+    """Find triadic colors"""
+    base_hue = _COLOR_WHEEL[base_color][0]
+    triadic_hues = [(base_hue + 120) % 360, (base_hue + 240) % 360]
+    
+    dists = np.stack([_circ_dist(t_hue) for t_hue in triadic_hues])
+    mask = np.any(dists < 30, axis=0)
+    return _COLOR_NAMES[mask].tolist()
+
+
+def _monochromatic_colors(base_color: str) -> List[str]:
+    """Find monochromatic colors"""
+    base_hue = _COLOR_WHEEL[base_color][0]
+    
+    mask = _circ_dist(base_hue) < 15
+    return _COLOR_NAMES[mask].tolist()
+
+
+_HARMONY_RULES = {
+    'complementary': _complementary_colors,
+    'analogous': _analogous_colors,
+    'triadic': _triadic_colors,
+    'monochromatic': _monochromatic_colors
+}
+
+# Every rule is a pure function of the base color, so the whole
+# input space (rules x wheel) is small enough to precompute
+_RULE_CACHE = {
+    harmony_type: {color: tuple(rule(color)) for color in _COLOR_WHEEL}
+    for harmony_type, rule in _HARMONY_RULES.items()
+}
+
+
+@functools.lru_cache(maxsize=512)
+def _complement_recommendations(colors_fs: frozenset) -> Tuple[str, ...]:
+    """Complementary colors for a set of input colors, in color-wheel order"""
+    complements = _RULE_CACHE['complementary']
+    recommendations = []
+    extend = recommendations.extend
+    
+    for color in _COLOR_WHEEL:
+        if color in colors_fs:
+            extend(complements[color])
+    
+    return tuple(dict.fromkeys(recommendations))
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _harmony_kernel(lut, idxs):
+        """Mean pairwise harmony score, looked up in _HARMONY_LUT for an array of codes"""
+        n = idxs.shape[0]
+        total = 0.0
+        for i in range(n):
+            for j in range(i + 1, n):
+                total += lut[idxs[i], idxs[j]]
+        return total / (n * (n - 1) / 2)
+
 class ColorAnalyzer:
     """Advanced color analysis and matching system for fashion"""
     
+    __slots__ = ('color_wheel', 'seasonal_palettes', 'color_harmony_rules')
+    
     def __init__(self):
-        self.color_wheel = {
-            'red': (0, 100, 100),
-            'orange': (30, 100, 100),
-            'yellow': (60, 100, 100),
-            'green': (120, 100, 100),
-            'blue': (240, 100, 100),
-            'purple': (270, 100, 100),
-            'pink': (330, 100, 100),
-            'brown': (30, 100, 30),
-            'black': (0, 0, 0),
-            'white': (0, 0, 100),
-            'gray': (0, 0, 50),
-            'navy': (240, 100, 25),
-            'beige': (30, 30, 80)
-        }
-        
-        self.seasonal_palettes = {
-            'spring': ['coral', 'yellow', 'green', 'pink', 'light_blue'],
-            'summer': ['blue', 'purple', 'gray', 'white', 'soft_pink'],
-            'autumn': ['orange', 'brown', 'gold', 'deep_red', 'olive'],
-            'winter': ['black', 'white', 'red', 'navy', 'silver']
-        }
-        
-        self.color_harmony_rules = {
-            'complementary': self._complementary_colors,
-            'analogous': self._analogous_colors,
-            'triadic': self._triadic_colors,
-            'monochromatic': self._monochromatic_colors
-        }
+        self.color_wheel = _COLOR_WHEEL
+        self.seasonal_palettes = _SEASONAL_PALETTES
+        self.color_harmony_rules = _HARMONY_RULES
     
     def analyze_color_palette(self, clothing_items: List[Dict]) -> Dict:
         """
@@ -52,38 +182,54 @@ class ColorAnalyzer:
         """
         try:
             # Extract colors from items
-            colors = []
-            for item in clothing_items:
-                item_colors = item.get('metadata', {}).get('dominant_colors', [])
-                colors.extend(item_colors)
-            
-            if not colors:
-                return self._get_default_analysis()
+            colors = list(itertools.chain.from_iterable(
+                item.get('metadata', {}).get('dominant_colors', ())
+                for item in clothing_items
+            ))
             
+            # Reduce to unique colors once; this also rejects unhashable entries
+            unique_colors = list(dict.fromkeys(colors))
+        except (AttributeError, TypeError) as e:
+            logger.error("Color analysis failed: %s", e)
+            return self._get_default_analysis()
+        
+        if not colors:
+            return self._get_default_analysis()
+        
+        # Weighted passes work on the integer codes
+        name_to_code = _NAME_TO_CODE
+        codes = np.fromiter(
+            (name_to_code[c] for c in colors if c in name_to_code),
+            dtype=np.int8
+        )
+        
+        if len(unique_colors) == 1:
+            # Single-color palette: harmony and scheme are known up front
+            harmony_score, color_scheme = 1.0, 'monochromatic'
+        else:
             # Analyze color harmony
-            harmony_score = self._calculate_color_harmony(colors)
+            harmony_score = self._calculate_color_harmony(unique_colors)
             
             # Determine color scheme
-            color_scheme = self._identify_color_scheme(colors)
-            
-            # Calculate color temperature
-            temperature = self._calculate_color_temperature(colors)
-            
-            # Assess seasonal appropriateness
-            seasonal_match = self._assess_seasonal_appropriateness(colors)
-            
-            return {
-                'dominant_colors': list(set(colors)),
-                'color_harmony_score': harmony_score,
-                'color_scheme': color_scheme,
-                'temperature': temperature,
-                'seasonal_match': seasonal_match,
-                'recommendations': self._generate_color_recommendations(colors)
-            }
-            
-        except Exception as e:
-            logger.error(f"Color analysis failed: {e}")
-            return self._get_default_analysis()
+            color_scheme = self._identify_color_scheme(unique_colors)
+        
+        # Warm/cool and seasonal counts in one pass over the codes
+        summary = self._summarize(codes)
+        
+        # Calculate color temperature
+        temperature = self._calculate_color_temperature(summary['warm'], summary['cool'])
+        
+        # Assess seasonal appropriateness
+        seasonal_match = self._assess_seasonal_appropriateness(summary['seasons'], len(colors))
+        
+        return {
+            'dominant_colors': unique_colors,
+            'color_harmony_score': harmony_score,
+            'color_scheme': color_scheme,
+            'temperature': temperature,
+            'seasonal_match': seasonal_match,
+            'recommendations': self._generate_color_recommendations(unique_colors)
+        }
     
     def find_matching_colors(self, base_color: str, harmony_type: str = 'complementary') -> List[str]:
         """
@@ -96,122 +242,68 @@ class ColorAnalyzer:
         Returns:
             List of matching colors
         """
-        if base_color not in self.color_wheel:
+        if base_color not in _COLOR_WHEEL:
             return []
         
-        if harmony_type in self.color_harmony_rules:
-            return self.color_harmony_rules[harmony_type](base_color)
+        if harmony_type in _RULE_CACHE:
+            return list(_RULE_CACHE[harmony_type][base_color])
         
         return []
     
-    def _complementary_colors(self, base_color: str) -> List[str]:
-        """Find complementary colors"""
-        base_hue = self.color_wheel[base_color][0]
-        complement_hue = (base_hue + 180) % 360
-        
-        # Find closest color names
-        matching_colors = []
-        for color_name, (hue, sat, val) in self.color_wheel.items():
-            if abs(hue - complement_hue) < 30:
-                matching_colors.append(color_name)
-        
-        return matching_colors
-    
-    def _analogous_colors(self, base_color: str) -> List[str]:
-        """Find analogous colors"""
-        base_hue = self.color_wheel[base_color][0]
-        
-        matching_colors = []
-        for color_name, (hue, sat, val) in self.color_wheel.items():
-            if abs(hue - base_hue) < 60 and color_name != base_color:
-                matching_colors.append(color_name)
-        
-        return matching_colors
-    
-    def _triadic_colors(self, base_color: str) -> List[str]:
-        """Find triadic colors"""
-        base_hue = self.color_wheel[base_color][0]
-        triadic_hues = [(base_hue + 120) % 360, (base_hue + 240) % 360]
-        
-        matching_colors = []
-        for color_name, (hue, sat, val) in self.color_wheel.items():
-            if any(abs(hue - t_hue) < 30 for t_hue in triadic_hues):
-                matching_colors.append(color_name)
-        
-        return matching_colors
-    
-    def _monochromatic_colors(self, base_color: str) -> List[str]:
-        """Find monochromatic colors"""
-        base_hue = self.color_wheel[base_color][0]
-        
-        matching_colors = []
-        for color_name, (hue, sat, val) in self.color_wheel.items():
-            if abs(hue - base_hue) < 15:
-                matching_colors.append(color_name)
-        
-        return matching_colors
-    
     def _calculate_color_harmony(self, colors: List[str]) -> float:
         """Calculate color harmony score"""
         if len(colors) < 2:
             return 1.0
         
-        harmony_score = 0.0
-        comparisons = 0
+        wheel, name_to_code = _COLOR_WHEEL, _NAME_TO_CODE
+        idxs = [name_to_code[c] for c in colors if c in wheel]
+        n = len(idxs)
+        if n < 2:
+            return 0.0
+        
+        if NUMBA_AVAILABLE:
+            return float(_harmony_kernel(_HARMONY_LUT, np.array(idxs, dtype=np.intp)))
         
-        for i in range(len(colors)):
-            for j in range(i + 1, len(colors)):
-                if colors[i] in self.color_wheel and colors[j] in self.color_wheel:
-                    score = self._calculate_color_pair_harmony(colors[i], colors[j])
-                    harmony_score += score
-                    comparisons += 1
+        score = _HARMONY_LUT[np.ix_(idxs, idxs)]
         
-        return harmony_score / comparisons if comparisons > 0 else 0.0
+        return float(np.triu(score, k=1).sum() / (n * (n - 1) / 2))
+    
+    def score_pairs(self, a_codes: np.ndarray, b_codes: np.ndarray) -> np.ndarray:
+        """
+        Score many color pairs at once
+        
+        Args:
+            a_codes: Color-wheel codes of the first color in each pair
+            b_codes: Color-wheel codes of the second color in each pair
+            
+        Returns:
+            Harmony score for each pair
+        """
+        return _HARMONY_LUT[a_codes, b_codes]
     
     def _calculate_color_pair_harmony(self, color1: str, color2: str) -> float:
         """Calculate harmony between two colors"""
-        hue1 = self.color_wheel[color1][0]
-        hue2 = self.color_wheel[color2][0]
-        
-        hue_diff = abs(hue1 - hue2)
-        if hue_diff > 180:
-            hue_diff = 360 - hue_diff
-        
-        # Complementary colors (180°) and analogous colors (30°) score higher
-        if abs(hue_diff - 180) < 30:
-            return 0.9  # Complementary
-        elif hue_diff < 30:
-            return 0.8  # Analogous
-        elif abs(hue_diff - 120) < 30:
-            return 0.7  # Triadic
-        else:
-            return 0.5  # Neutral
+        return float(_HARMONY_LUT[_NAME_TO_CODE[color1], _NAME_TO_CODE[color2]])
     
     def _identify_color_scheme(self, colors: List[str]) -> str:
-        """Identify the color scheme of the outfit"""
+        """Identify the color scheme of the outfit from its distinct colors"""
         if len(colors) < 2:
             return 'monochromatic'
-        
-        # Check for specific schemes
-        unique_colors = list(set(colors))
-        
-        if len(unique_colors) == 1:
-            return 'monochromatic'
-        elif len(unique_colors) == 2:
+        elif len(colors) == 2:
             return 'complementary'
-        elif len(unique_colors) == 3:
+        elif len(colors) == 3:
             return 'triadic'
         else:
             return 'complex'
     
-    def _calculate_color_temperature(self, colors: List[str]) -> str:
+    def _summarize(self, codes: np.ndarray) -> Dict:
+        """Warm, cool and per-season color counts for an array of color codes"""
+        count_vec = np.bincount(codes, minlength=len(_CODE_TO_NAME))
+        totals = (_SUMMARY_MAT @ count_vec).tolist()
+        return {'warm': totals[0], 'cool': totals[1], 'seasons': totals[2:]}
+    
+    def _calculate_color_temperature(self, warm_count: int, cool_count: int) -> str:
         """Calculate overall color temperature"""
-        warm_colors = ['red', 'orange', 'yellow', 'pink', 'brown']
-        cool_colors = ['blue', 'green', 'purple', 'gray']
-        
-        warm_count = sum(1 for color in colors if color in warm_colors)
-        cool_count = sum(1 for color in colors if color in cool_colors)
-        
         if warm_count > cool_count:
             return 'warm'
         elif cool_count > warm_count:
@@ -219,18 +311,17 @@ class ColorAnalyzer:
         else:
             return 'neutral'
     
-    def _assess_seasonal_appropriateness(self, colors: List[str]) -> Dict:
+    def _assess_seasonal_appropriateness(self, season_counts: List[int], total: int) -> Dict:
         """Assess which seasons the color palette suits"""
         seasonal_scores = {}
+        best_season, best_score = None, -1.0
         
-        for season, palette in self.seasonal_palettes.items():
-            score = 0
-            for color in colors:
-                if color in palette:
-                    score += 1
-            seasonal_scores[season] = score / len(colors) if colors else 0
+        for season, score in zip(_SEASONS, season_counts):
+            score = score / total if total else 0
+            seasonal_scores[season] = score
+            if score > best_score:
+                best_season, best_score = season, score
         
-        best_season = max(seasonal_scores, key=seasonal_scores.get)
         return {
             'best_season': best_season,
             'season_scores': seasonal_scores
@@ -238,15 +329,7 @@ class ColorAnalyzer:
     
     def _generate_color_recommendations(self, colors: List[str]) -> List[str]:
         """Generate color recommendations for the outfit"""
-        recommendations = []
-        
-        for color in colors:
-            if color in self.color_wheel:
-                # Find complementary colors
-                complements = self.find_matching_colors(color, 'complementary')
-                recommendations.extend(complements)
-        
-        return list(set(recommendations))
+        return list(_complement_recommendations(frozenset(colors)))
     
     def _get_default_analysis(self) -> Dict:
         """Return default color analysis"""
@@ -1,13 +1,21 @@
 # Enhanced app/ai/recommendations.py with extensive debugging
 from typing import List, Dict, Optional
 import numpy as np
+from collections import Counter, OrderedDict, defaultdict
 from datetime import datetime
+import copy
+import heapq
+import itertools
 import logging
-from sqlalchemy.orm import Session
+import operator
+import threading
+from sqlalchemy import func
+from sqlalchemy.orm import Session, load_only
 from app.models.clothing import ClothingItem
 from app.models.user import User
 from app.models.outfit import Outfit
 import random
+import sys
 
 # Try to import ML models
 try:
@@ -17,11 +25,99 @@ try:
 except ImportError:
     ML_AVAILABLE = False
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# LRU cache of final recommendations, shared by every engine instance since
+# the router builds a new engine per request. Keys carry a wardrobe
+# fingerprint, so adding clothes or editing preferences misses naturally.
+_RECOMMENDATION_CACHE_SIZE = 4096
+_recommendation_cache: "OrderedDict[tuple, List[Dict]]" = OrderedDict()
+_recommendation_cache_lock = threading.Lock()
+
+
+def _cache_get(key: tuple) -> Optional[List[Dict]]:
+    """Return a private copy of a cached result, or None on a miss"""
+    with _recommendation_cache_lock:
+        cached = _recommendation_cache.get(key)
+        if cached is None:
+            return None
+        _recommendation_cache.move_to_end(key)
+    return copy.deepcopy(cached)
+
+
+def _cache_put(key: tuple, recommendations: List[Dict]) -> None:
+    """Store a private copy of a result, evicting the least recently used entry"""
+    value = copy.deepcopy(recommendations)
+    with _recommendation_cache_lock:
+        _recommendation_cache[key] = value
+        _recommendation_cache.move_to_end(key)
+        if len(_recommendation_cache) > _RECOMMENDATION_CACHE_SIZE:
+            _recommendation_cache.popitem(last=False)
+
+# The only columns the pipeline reads; skips brand, dates and usage tracking
+_RECOMMENDATION_COLUMNS = (
+    ClothingItem.item_id,
+    ClothingItem.category,
+    ClothingItem.color,
+    ClothingItem.image_url,
+    ClothingItem.item_metadata,
+)
+
+# Raw names are user-entered, so bound the normalization cache
+_INTERNED_NAMES_SIZE = 1024
+
+# Text embeddings of item descriptions ("color category"), LRU-bounded. Keyed
+# by the text itself, so edited items miss naturally and deleted ones age out
+_ITEM_EMBED_CACHE_SIZE = 4096
+_item_embed_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_item_embed_cache_lock = threading.Lock()
+
+# Final score: confidence plus preference and AI bonuses, capped at 1.0.
+# Plain (non-fastmath, serial) so scores match the scalar formula exactly
+# and small batches don't pay thread start-up
+_PREFERENCE_BONUS = 0.1
+_AI_BONUS = 0.05
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _score_candidates(confidence, pref_match, ai_match):
+        """Final score for every candidate in one fused pass"""
+        n = confidence.shape[0]
+        out = np.empty(n, dtype=np.float64)
+        for i in range(n):
+            score = confidence[i]
+            if pref_match[i]:
+                score += _PREFERENCE_BONUS
+            if ai_match[i]:
+                score += _AI_BONUS
+            out[i] = score if score < 1.0 else 1.0
+        return out
+else:
+    def _score_candidates(confidence, pref_match, ai_match):
+        """Final score for every candidate in one fused pass"""
+        score = confidence + np.where(pref_match, _PREFERENCE_BONUS, 0.0)
+        score += np.where(ai_match, _AI_BONUS, 0.0)
+        return np.minimum(score, 1.0)
+
 class OutfitRecommendationEngine:
     """AI-enhanced outfit recommendation system with extensive debugging"""
     
+    # Suffix for outfit ids; shared by all engines since the router builds one per request
+    _rec_counter = itertools.count(1)
+    
+    _ITEM_FIELDS = operator.attrgetter('item_id', 'category', 'color')
+    
+    # Raw color/category string -> interned lowercase form, shared across engines
+    _interned_names: Dict[str, str] = {}
+    
+    _NEUTRAL_COLORS = frozenset({'black', 'white', 'gray', 'grey', 'navy', 'beige', 'brown'})
+    
     def __init__(self):
         logger.info("🔧 Initializing OutfitRecommendationEngine...")
         
@@ -57,6 +153,24 @@ class OutfitRecommendationEngine:
             'footwear': ['shoes', 'sneakers', 'boots', 'sandals', 'heels']
         }
         
+        # Freeze every list of names into a lowercase frozenset for O(1) membership;
+        # names are interned so lookups against projected values hit identity first
+        for mapping in (self.mood_style_mapping, self.occasion_requirements, self.weather_adjustments):
+            for rules in mapping.values():
+                for key, value in rules.items():
+                    if isinstance(value, list):
+                        rules[key] = frozenset(sys.intern(v.lower()) for v in value)
+        
+        self.essential_categories = {
+            bucket: frozenset(sys.intern(name.lower()) for name in names)
+            for bucket, names in self.essential_categories.items()
+        }
+        self._category_bucket = {
+            name: bucket
+            for bucket, names in self.essential_categories.items()
+            for name in names
+        }
+        
         # Initialize AI models if available
         self.ai_models = {}
         if ML_AVAILABLE:
@@ -75,47 +189,133 @@ class OutfitRecommendationEngine:
     ) -> List[Dict]:
         """Generate AI-enhanced outfit recommendations with extensive debugging"""
         
-        logger.info(f"🎯 Starting recommendations for user {user_id}")
-        logger.info(f"   Mood: {mood}, Occasion: {occasion}, Weather: {weather}")
+        logger.info("🎯 Starting recommendations for user %s", user_id)
+        logger.debug("   Mood: %s, Occasion: %s, Weather: %s", mood, occasion, weather)
+        
+        cache_key = None
+        try:
+            weather_condition = weather.get('condition', 'mild').lower() if weather else 'mild'
+            cache_key = (
+                str(user_id), mood, occasion, weather_condition, num_recommendations,
+                self._wardrobe_fingerprint(user_id, db)
+            )
+            cached = _cache_get(cache_key)
+            if cached is not None:
+                logger.debug("♻️ Returning cached recommendations for user %s", user_id)
+                return cached
+        except Exception as e:
+            logger.warning("⚠️ Recommendation cache lookup failed: %s", e)
+            cache_key = None
+        
+        # Step 1: Get user's clothing items
+        user_clothes = self._get_user_clothing(user_id, db)
+        
+        # Step 2: Get user preferences
+        user_preferences = self._get_user_preferences(user_id, db) if user_clothes else {}
+        
+        return self._recommend_for_user(
+            user_id, user_clothes, user_preferences, mood, occasion, weather,
+            num_recommendations, cache_key
+        )
+
+    def generate_outfit_recommendations_batch(
+        self,
+        user_ids: List[str],
+        mood: str,
+        occasion: str,
+        weather: Dict,
+        db: Session,
+        num_recommendations: int = 3
+    ) -> Dict[str, List[Dict]]:
+        """Generate recommendations for many users, loading all wardrobes in one query"""
+        
+        logger.info("🎯 Starting batch recommendations for %d users", len(user_ids))
+        if not user_ids:
+            return {}
         
         try:
-            # Step 1: Get user's clothing items
-            user_clothes = self._get_user_clothing(user_id, db)
-            logger.info(f"📦 Found {len(user_clothes)} clothing items for user {user_id}")
+            rows = (
+                db.query(ClothingItem)
+                .options(load_only(*_RECOMMENDATION_COLUMNS, ClothingItem.user_id, ClothingItem.created_at))
+                .filter(ClothingItem.user_id.in_(user_ids))
+                .all()
+            )
+            users = db.query(User).filter(User.user_id.in_(user_ids)).all()
+        except Exception as e:
+            logger.error("💥 Database error batch-loading wardrobes: %s", e)
+            return {str(user_id): [] for user_id in user_ids}
+        
+        clothes_by_user = defaultdict(list)
+        for item in rows:
+            clothes_by_user[str(item.user_id)].append(item)
+        users_by_id = {str(user.user_id): user for user in users}
+        
+        weather_condition = weather.get('condition', 'mild').lower() if weather else 'mild'
+        results = {}
+        
+        for user_id in user_ids:
+            key = str(user_id)
+            user_clothes = clothes_by_user.get(key, [])
+            user = users_by_id.get(key)
+            
+            # Same key as the single-user path, so both share cached results
+            cache_key = (
+                key, mood, occasion, weather_condition, num_recommendations,
+                self._wardrobe_fingerprint_from(user_clothes, user)
+            )
+            cached = _cache_get(cache_key)
+            if cached is not None:
+                results[key] = cached
+                continue
+            
+            user_preferences = (user.style_preferences or {}) if user is not None else {}
+            results[key] = self._recommend_for_user(
+                user_id, user_clothes, user_preferences, mood, occasion, weather,
+                num_recommendations, cache_key
+            )
+        
+        return results
+
+    def _recommend_for_user(
+        self,
+        user_id: str,
+        user_clothes: List[ClothingItem],
+        user_preferences: Dict,
+        mood: str,
+        occasion: str,
+        weather: Dict,
+        num_recommendations: int,
+        cache_key: Optional[tuple] = None
+    ) -> List[Dict]:
+        """Run the recommendation pipeline on an already-loaded wardrobe"""
+        try:
+            logger.debug("📦 Found %d clothing items for user %s", len(user_clothes), user_id)
             
             if not user_clothes:
                 logger.warning("❌ No clothing items found - returning empty recommendations")
                 return []
             
-            # Debug: Log some sample items
-            for i, item in enumerate(user_clothes[:3]):  # Log first 3 items
-                logger.info(f"   Item {i+1}: {item.category} - {item.color} (ID: {item.item_id})")
-            
-            # Step 2: Get user preferences
-            user_preferences = self._get_user_preferences(user_id, db)
-            logger.info(f"👤 User preferences: {user_preferences}")
+            logger.debug("👤 User preferences: %s", user_preferences)
             
             # Step 3: Generate recommendations
             recommendations = []
             
             # Always try rule-based first (more reliable)
-            logger.info("🔧 Generating rule-based recommendations...")
             rule_based_recs = self._generate_rule_based_recommendations(
                 user_clothes, mood, occasion, weather, user_preferences, num_recommendations
             )
-            logger.info(f"✅ Generated {len(rule_based_recs)} rule-based recommendations")
+            logger.debug("✅ Generated %d rule-based recommendations", len(rule_based_recs))
             recommendations.extend(rule_based_recs)
             
             # Add AI-enhanced if available
             if ML_AVAILABLE and self.ai_models:
-                logger.info("🤖 Generating AI-enhanced recommendations...")
                 ai_enhanced_recs = self._generate_ai_enhanced_recommendations(
                     user_clothes, mood, occasion, weather, user_preferences, num_recommendations
                 )
-                logger.info(f"✅ Generated {len(ai_enhanced_recs)} AI-enhanced recommendations")
+                logger.debug("✅ Generated %d AI-enhanced recommendations", len(ai_enhanced_recs))
                 recommendations.extend(ai_enhanced_recs)
             else:
-                logger.info("⚠️ AI models not available, using rule-based only")
+                logger.debug("⚠️ AI models not available, using rule-based only")
             
             # Step 4: Process and rank recommendations
             if not recommendations:
@@ -124,30 +324,23 @@ class OutfitRecommendationEngine:
                 if emergency_rec:
                     recommendations = [emergency_rec]
             
-            # Remove duplicates and rank
-            unique_recommendations = self._deduplicate_recommendations(recommendations)
-            logger.info(f"🔄 After deduplication: {len(unique_recommendations)} unique recommendations")
-            
-            scored_recommendations = self._score_recommendations(
-                unique_recommendations, user_preferences, mood, occasion
+            # Score, remove duplicates (keeping the best-scored copy) and rank
+            final_recommendations = self._score_recommendations(
+                recommendations, user_preferences, mood, occasion, num_recommendations
             )
+            logger.info("🎯 Returning %d final recommendations", len(final_recommendations))
             
-            final_recommendations = scored_recommendations[:num_recommendations]
-            logger.info(f"🎯 Returning {len(final_recommendations)} final recommendations")
-            
-            # Debug: Log final recommendations
-            for i, rec in enumerate(final_recommendations):
-                logger.info(f"   Rec {i+1}: {len(rec['items'])} items, confidence: {rec.get('confidence_score', 0):.2f}")
+            if cache_key is not None:
+                _cache_put(cache_key, final_recommendations)
             
             return final_recommendations
             
         except Exception as e:
-            logger.error(f"💥 Recommendation generation failed completely: {e}")
-            logger.error(f"   User ID: {user_id}, Mood: {mood}, Occasion: {occasion}")
+            logger.error("💥 Recommendation generation failed completely: %s", e)
+            logger.error("   User ID: %s, Mood: %s, Occasion: %s", user_id, mood, occasion)
             
             # Emergency fallback - try to create at least one recommendation
             try:
-                user_clothes = self._get_user_clothing(user_id, db)
                 if user_clothes:
                     emergency_rec = self._create_emergency_recommendation(user_clothes, mood, occasion)
                     return [emergency_rec] if emergency_rec else []
@@ -156,37 +349,86 @@ class OutfitRecommendationEngine:
             
             return []
 
+    def _wardrobe_fingerprint(self, user_id: str, db: Session) -> tuple:
+        """Cheap summary of a user's wardrobe and preferences that changes whenever they do"""
+        latest_item, item_count = db.query(
+            func.max(ClothingItem.created_at), func.count(ClothingItem.item_id)
+        ).filter(ClothingItem.user_id == user_id).one()
+        preferences_updated = db.query(User.updated_at).filter(User.user_id == user_id).scalar()
+        return (latest_item, item_count, preferences_updated)
+
+    @staticmethod
+    def _wardrobe_fingerprint_from(items: List[ClothingItem], user: Optional[User]) -> tuple:
+        """_wardrobe_fingerprint computed from rows that are already loaded"""
+        latest_item = max((item.created_at for item in items if item.created_at is not None), default=None)
+        return (latest_item, len(items), user.updated_at if user is not None else None)
+
     def _get_user_clothing(self, user_id: str, db: Session) -> List[ClothingItem]:
         """Retrieve user's clothing items from database with debugging"""
         try:
-            logger.info(f"🔍 Querying clothing items for user {user_id}")
-            items = db.query(ClothingItem).filter(ClothingItem.user_id == user_id).all()
+            logger.debug("🔍 Querying clothing items for user %s", user_id)
+            items = (
+                db.query(ClothingItem)
+                .options(load_only(*_RECOMMENDATION_COLUMNS))
+                .filter(ClothingItem.user_id == user_id)
+                .all()
+            )
             
             if not items:
-                logger.warning(f"❌ No clothing items found in database for user {user_id}")
+                logger.warning("❌ No clothing items found in database for user %s", user_id)
                 # Check if user exists
                 user_exists = db.query(User).filter(User.user_id == user_id).first()
                 if not user_exists:
-                    logger.error(f"❌ User {user_id} doesn't exist in database")
+                    logger.error("❌ User %s doesn't exist in database", user_id)
                 else:
-                    logger.info(f"✅ User {user_id} exists but has no clothing items")
+                    logger.info("✅ User %s exists but has no clothing items", user_id)
             
             return items
             
         except Exception as e:
-            logger.error(f"💥 Database error getting user clothing: {e}")
+            logger.error("💥 Database error getting user clothing: %s", e)
             return []
 
+    def find_similar_items(self, item_id, db: Session, limit: int = 20) -> Optional[List[Dict]]:
+        """Items from the same wardrobe that look most like item_id, nearest first
+        
+        Returns None when the item doesn't exist or has no image embedding.
+        """
+        reference = (
+            db.query(ClothingItem.user_id, ClothingItem.embedding)
+            .filter(ClothingItem.item_id == item_id)
+            .first()
+        )
+        if reference is None or reference.embedding is None:
+            return None
+        
+        # Exact cosine distance (<=>) ordering over one wardrobe, found through
+        # ix_items_user_cat; a wardrobe is small enough to sort outright
+        items = (
+            db.query(ClothingItem)
+            .options(load_only(*_RECOMMENDATION_COLUMNS))
+            .filter(
+                ClothingItem.user_id == reference.user_id,
+                ClothingItem.item_id != item_id,
+                ClothingItem.embedding.isnot(None)
+            )
+            .order_by(ClothingItem.embedding.cosine_distance(reference.embedding))
+            .limit(limit)
+            .all()
+        )
+        logger.debug("🔎 Found %d items similar to %s", len(items), item_id)
+        return [self._item_to_dict(item) for item in items]
+
     def _get_user_preferences(self, user_id: str, db: Session) -> Dict:
         """Get user style preferences with debugging"""
         try:
             user = db.query(User).filter(User.user_id == user_id).first()
             if user and hasattr(user, 'style_preferences') and user.style_preferences:
                 return user.style_preferences
-            logger.info(f"👤 No style preferences found for user {user_id}")
+            logger.debug("👤 No style preferences found for user %s", user_id)
             return {}
         except Exception as e:
-            logger.error(f"💥 Error getting user preferences: {e}")
+            logger.error("💥 Error getting user preferences: %s", e)
             return {}
 
     def _generate_rule_based_recommendations(
@@ -200,158 +442,131 @@ class OutfitRecommendationEngine:
     ) -> List[Dict]:
         """Generate recommendations using rule-based system with debugging"""
         
-        logger.info(f"🔧 Creating {num_recommendations} rule-based recommendations")
+        logger.debug("🔧 Creating %d rule-based recommendations", num_recommendations)
         recommendations = []
         
-        # Create multiple variations to avoid duplicates
-        for attempt in range(num_recommendations * 2):  # Try more attempts
-            logger.info(f"   Attempt {attempt + 1}")
-            
-            # Shuffle items for variety
-            shuffled_clothes = user_clothes.copy()
-            random.shuffle(shuffled_clothes)
-            
+        if not user_clothes:
+            logger.warning("❌ _generate_rule_based_recommendations: No clothing items provided")
+            return recommendations
+        
+        # Shuffle once before filtering so the weather filter's preferred
+        # categories stay at the front of each bucket
+        shuffled_clothes = user_clothes.copy()
+        random.shuffle(shuffled_clothes)
+        
+        # Filter and categorize once; variation k then rotates to the k-th
+        # item of every bucket instead of reshuffling per attempt
+        categorized_items, candidates = self._filter_and_categorize(
+            shuffled_clothes, mood, occasion, weather
+        )
+        
+        for variant in range(num_recommendations):
             outfit = self._create_outfit_recommendation(
-                shuffled_clothes, mood, occasion, weather, user_preferences
+                categorized_items, candidates, mood, occasion, variant
             )
             
             if outfit:
                 outfit['recommendation_method'] = 'rule_based'
-                outfit['attempt_number'] = attempt + 1
+                outfit['attempt_number'] = variant + 1
                 recommendations.append(outfit)
-                logger.info(f"   ✅ Created recommendation with {len(outfit['items'])} items")
-                
-                if len(recommendations) >= num_recommendations:
-                    break
-            else:
-                logger.warning(f"   ❌ Attempt {attempt + 1} failed to create outfit")
         
-        logger.info(f"🔧 Rule-based generation complete: {len(recommendations)} recommendations")
+        failed = num_recommendations - len(recommendations)
+        if failed:
+            logger.warning("   ❌ %d of %d variations failed to create an outfit", failed, num_recommendations)
+        logger.debug("🔧 Rule-based generation complete: %d recommendations", len(recommendations))
         return recommendations
 
-    def _create_outfit_recommendation(self, clothing_items, mood, occasion, weather, user_preferences):
-        """MAIN IMPLEMENTATION - Create rule-based outfit recommendation with extensive debugging"""
+    def _filter_and_categorize(self, clothing_items, mood, occasion, weather):
+        """Apply the occasion, mood and weather filters and bucket the survivors by category"""
+        # Resolve the rule sets once; unknown keys come through as None and
+        # their filters return immediately
+        occ_req = self.occasion_requirements.get(occasion)
+        mood_style = self.mood_style_mapping.get(mood)
+        weather_condition = weather.get('condition', 'mild').lower() if weather else 'mild'
+        weather_adj = self.weather_adjustments.get(weather_condition)
+        if weather_adj is not None and weather_adj.get('neutral'):
+            weather_adj = None
+        
+        # Step 1: Apply filters with fallbacks
+        # Project items once; each filter yields a mask over the whole wardrobe
+        # and the masks are combined in a single pass
+        projected = self._project_items(clothing_items)
+        keep = np.ones(len(projected['items']), dtype=bool)
+        weather_applied = False
+        
+        for label, mask in (
+            ('Occasion', self._filter_by_occasion(projected, occ_req)),
+            ('Mood', self._filter_by_mood(projected, mood_style)),
+            ('Weather', self._filter_by_weather(projected, weather_adj)),
+        ):
+            if mask is None:
+                continue
+            narrowed = keep & mask
+            if narrowed.any():
+                keep = narrowed
+                weather_applied = label == 'Weather'
+            else:
+                logger.debug("   ⚠️ %s filter too restrictive, keeping current items", label)
         
-        if not clothing_items:
-            logger.warning("❌ _create_outfit_recommendation: No clothing items provided")
-            return None
+        current_idx = np.flatnonzero(keep)
+        
+        # Prefer certain categories (move to front)
+        if weather_applied and 'prefer_categories' in weather_adj:
+            preferred = self._isin(projected['categories'][current_idx], weather_adj['prefer_categories'])
+            current_idx = np.concatenate([current_idx[preferred], current_idx[~preferred]])
+        
+        # Step 2: Categorize items
+        categorized_items = self._categorize_items(projected, current_idx)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📂 Filtered %d/%d items into %s", len(current_idx), len(clothing_items),
+                         {category: len(items) for category, items in categorized_items.items() if items})
+        
+        items = projected['items']
+        candidates = [items[i] for i in current_idx.tolist()]
+        return categorized_items, candidates
 
+    def _create_outfit_recommendation(self, categorized_items, candidates, mood, occasion, variant=0):
+        """MAIN IMPLEMENTATION - Create rule-based outfit recommendation with extensive debugging"""
+        
         try:
-            logger.info(f"🏗️ Building outfit from {len(clothing_items)} items")
-            logger.info(f"   Mood: {mood}, Occasion: {occasion}")
-            
-            # Step 1: Apply filters with fallbacks
-            logger.info("🔍 Applying filters...")
-            
-            # Start with all items
-            current_items = clothing_items.copy()
-            logger.info(f"   Starting with {len(current_items)} items")
-            
-            # Filter by occasion (with fallback)
-            occasion_filtered = self._filter_by_occasion(current_items, occasion)
-            if occasion_filtered:
-                current_items = occasion_filtered
-                logger.info(f"   After occasion filter: {len(current_items)} items")
-            else:
-                logger.warning("   ⚠️ Occasion filter too restrictive, keeping all items")
-            
-            # Filter by mood (with fallback)
-            mood_filtered = self._filter_by_mood(current_items, mood)
-            if mood_filtered:
-                current_items = mood_filtered
-                logger.info(f"   After mood filter: {len(current_items)} items")
-            else:
-                logger.warning("   ⚠️ Mood filter too restrictive, keeping current items")
-            
-            # Filter by weather (with fallback)
-            weather_filtered = self._filter_by_weather(current_items, weather)
-            if weather_filtered:
-                current_items = weather_filtered
-                logger.info(f"   After weather filter: {len(current_items)} items")
-            else:
-                logger.warning("   ⚠️ Weather filter too restrictive, keeping current items")
-            
-            if not current_items:
-                logger.warning("❌ All filters removed all items, using original list")
-                current_items = clothing_items
-            
-            # Step 2: Categorize items
-            logger.info("📂 Categorizing items...")
-            categorized_items = self._categorize_items(current_items)
-            
-            for category, items in categorized_items.items():
-                if items:
-                    logger.info(f"   {category}: {len(items)} items")
-            
             # Step 3: Build outfit
-            logger.info("👗 Building complete outfit...")
-            outfit_items = self._build_complete_outfit(categorized_items, mood, occasion)
+            outfit_items = self._build_complete_outfit(categorized_items, mood, occasion, variant)
             
             if not outfit_items:
-                logger.warning("❌ Failed to build complete outfit, using fallback selection")
+                logger.debug("❌ Failed to build complete outfit, using fallback selection")
                 # Fallback: just pick first few items
-                outfit_items = current_items[:min(3, len(current_items))]
-            
-            logger.info(f"✅ Selected {len(outfit_items)} items for outfit")
+                outfit_items = candidates[:3]
             
             # Step 4: Format output
-            selected_items = []
-            for item in outfit_items:
-                try:
-                    item_dict = {
-                        "item_id": str(item.item_id),
-                        "category": str(item.category),
-                        "color": str(item.color),
-                        "image_url": getattr(item, 'image_path', '') or '',
-                        "metadata": {}
-                    }
-                    
-                    # Safely handle metadata
-                    if hasattr(item, 'metadata') and item.metadata:
-                        if isinstance(item.metadata, dict):
-                            item_dict["metadata"] = {
-                                "ai_analysis": item.metadata.get("ai_analysis", {}),
-                                "formality_level": item.metadata.get("formality_level", 2)
-                            }
-                        else:
-                            item_dict["metadata"] = {"formality_level": 2}
-                    else:
-                        item_dict["metadata"] = {"formality_level": 2}
-                    
-                    selected_items.append(item_dict)
-                    logger.info(f"   ✅ Added {item.category} - {item.color}")
-                    
-                except Exception as e:
-                    logger.error(f"   ❌ Error processing item {getattr(item, 'item_id', 'unknown')}: {e}")
-                    continue
+            selected_items = [self._item_to_dict(item) for item in outfit_items]
             
             if not selected_items:
                 logger.error("❌ No items could be processed for outfit")
                 return None
             
             # Step 5: Calculate confidence and create final outfit
-            confidence = self._calculate_confidence_score(selected_items, mood, occasion)
+            confidence, harmony, description = self._finalize_outfit_metrics(selected_items, mood)
+            now = datetime.now()
             
             outfit = {
-                "outfit_id": f"rec_{int(datetime.now().timestamp())}_{random.randint(1000, 9999)}",
+                "outfit_id": f"rec_{int(now.timestamp())}_{next(self._rec_counter)}",
                 "items": selected_items,
                 "mood": mood,
                 "occasion": occasion,
                 "confidence_score": confidence,
-                "style_description": self._generate_style_description(selected_items, mood),
-                "color_harmony": self._assess_color_harmony(selected_items),
+                "style_description": description,
+                "color_harmony": harmony,
                 "weather_appropriate": True,
-                "created_at": datetime.now().isoformat()
+                "created_at": now.isoformat()
             }
             
-            logger.info(f"✅ Created outfit {outfit['outfit_id']} with confidence {confidence:.2f}")
+            logger.debug("✅ Created outfit %s with confidence %.2f", outfit['outfit_id'], confidence)
             return outfit
 
         except Exception as e:
-            logger.error(f"💥 _create_outfit_recommendation failed: {e}")
-            logger.error(f"   Error type: {type(e).__name__}")
-            import traceback
-            logger.error(f"   Traceback: {traceback.format_exc()}")
+            logger.exception("💥 _create_outfit_recommendation failed: %s", e,
+                             extra={"error_type": type(e).__name__})
             return None
 
     def _create_emergency_recommendation(self, clothing_items: List[ClothingItem], mood: str, occasion: str) -> Optional[Dict]:
@@ -363,15 +578,7 @@ class OutfitRecommendationEngine:
         
         try:
             # Just take the first 1-3 items
-            selected_items = []
-            for item in clothing_items[:3]:
-                selected_items.append({
-                    "item_id": str(item.item_id),
-                    "category": str(item.category),
-                    "color": str(item.color),
-                    "image_url": getattr(item, 'image_path', '') or '',
-                    "metadata": {"formality_level": 2}
-                })
+            selected_items = [self._item_to_dict(item) for item in clothing_items[:3]]
             
             return {
                 "outfit_id": f"emergency_{int(datetime.now().timestamp())}",
@@ -386,265 +593,348 @@ class OutfitRecommendationEngine:
             }
             
         except Exception as e:
-            logger.error(f"💥 Even emergency recommendation failed: {e}")
+            logger.error("💥 Even emergency recommendation failed: %s", e)
             return None
 
-    # Keep all your existing filter methods but add debugging
-    def _filter_by_occasion(self, items: List[ClothingItem], occasion: str) -> List[ClothingItem]:
-        """Filter items suitable for the occasion"""
-        logger.info(f"🔍 Filtering by occasion: {occasion}")
-        
-        if occasion not in self.occasion_requirements:
-            logger.info(f"   Unknown occasion '{occasion}', keeping all items")
-            return items
-        
-        requirements = self.occasion_requirements[occasion]
-        filtered = []
-        
-        for item in items:
-            try:
-                # Check formality level
-                formality = 2  # default
-                if hasattr(item, 'metadata') and item.metadata and isinstance(item.metadata, dict):
-                    formality = item.metadata.get('formality_level', 2)
-                
-                if formality >= requirements['formality_min']:
-                    filtered.append(item)
-                elif item.color and item.color.lower() in requirements['colors']:
-                    filtered.append(item)
-                    
-            except Exception as e:
-                logger.warning(f"   Error processing item {getattr(item, 'item_id', 'unknown')}: {e}")
-                # Include item anyway to avoid empty results
-                filtered.append(item)
-        
-        logger.info(f"   Occasion filter result: {len(filtered)}/{len(items)} items")
-        return filtered if filtered else items
-
-    def _filter_by_mood(self, items: List[ClothingItem], mood: str) -> List[ClothingItem]:
-        """Filter items that match the mood"""
-        logger.info(f"🔍 Filtering by mood: {mood}")
-        
-        if mood not in self.mood_style_mapping:
-            logger.info(f"   Unknown mood '{mood}', keeping all items")
-            return items
-        
-        mood_style = self.mood_style_mapping[mood]
-        filtered = []
+    def _project_items(self, items: List[ClothingItem]) -> Dict:
+        """Project items once into parallel arrays of the attributes the filters read.
+
+        Items are validated here so the filters can assume clean values;
+        malformed ones are dropped and counted.
+        """
+        valid, colors, categories, formality = [], [], [], []
+        interned = self._interned_names
+        skipped = 0
         
         for item in items:
-            try:
-                # Check color match
-                if item.color and item.color.lower() in mood_style['colors']:
-                    filtered.append(item)
-                else:
-                    # Check formality match
-                    formality = 2
-                    if hasattr(item, 'metadata') and item.metadata and isinstance(item.metadata, dict):
-                        formality = item.metadata.get('formality_level', 2)
-                    
-                    if abs(formality - mood_style['formality']) <= 1:
-                        filtered.append(item)
-                        
-            except Exception as e:
-                logger.warning(f"   Error processing item {getattr(item, 'item_id', 'unknown')}: {e}")
-                filtered.append(item)  # Include anyway
-        
-        logger.info(f"   Mood filter result: {len(filtered)}/{len(items)} items")
-        return filtered if filtered else items
-
-    def _filter_by_weather(self, items: List[ClothingItem], weather: Dict) -> List[ClothingItem]:
-        """Filter items suitable for weather conditions"""
-        weather_condition = weather.get('condition', 'mild').lower() if weather else 'mild'
-        logger.info(f"🔍 Filtering by weather: {weather_condition}")
+            color, category = item.color, item.category
+            level = self._get_formality(item)
+            if (item.item_id is None
+                    or not isinstance(color or '', str)
+                    or not isinstance(category or '', str)
+                    or not -128 <= level <= 127):
+                skipped += 1
+                continue
+            valid.append(item)
+            colors.append((interned.get(color) or self._intern_name(color)) if color else '')
+            categories.append((interned.get(category) or self._intern_name(category)) if category else '')
+            formality.append(level)
+        
+        if skipped:
+            logger.warning("⚠️ Skipped %d malformed clothing items", skipped)
+        
+        return {
+            'items': valid,
+            'colors': np.array(colors, dtype=object),
+            'categories': np.array(categories, dtype=object),
+            'formality': np.array(formality, dtype=np.int8)
+        }
+
+    @classmethod
+    def _intern_name(cls, value: str) -> str:
+        """Lowercased, interned form of a raw color or category string"""
+        name = sys.intern(value.lower())
+        if len(cls._interned_names) < _INTERNED_NAMES_SIZE:
+            cls._interned_names[value] = name
+        return name
+
+    def _item_to_dict(self, item: ClothingItem) -> Dict:
+        """Serialize an item for a recommendation payload"""
+        item_id, category, color = self._ITEM_FIELDS(item)
+        return {
+            "item_id": str(item_id),
+            "category": str(category),
+            "color": str(color),
+            "image_url": item.image_url or '',
+            "metadata": self._normalize_metadata(item)
+        }
+
+    @staticmethod
+    def _normalize_metadata(item: ClothingItem) -> Dict:
+        """The subset of item metadata exposed in recommendations"""
+        metadata = item.item_metadata
+        if isinstance(metadata, dict) and metadata:
+            return {
+                "ai_analysis": metadata.get("ai_analysis", {}),
+                "formality_level": metadata.get("formality_level", 2)
+            }
+        return {"formality_level": 2}
+
+    @staticmethod
+    def _get_formality(item: ClothingItem) -> int:
+        """Formality level from an item's metadata, defaulting to 2"""
+        metadata = item.item_metadata
+        level = metadata.get('formality_level', 2) if isinstance(metadata, dict) else 2
+        # JSON metadata may hold the level as 3.0 or "3"
+        try:
+            return int(float(level))
+        except (TypeError, ValueError, OverflowError):
+            return 2
+
+    @staticmethod
+    def _isin(values: np.ndarray, names: frozenset) -> np.ndarray:
+        """Boolean mask of which projected values are in a name set"""
+        return np.fromiter((v in names for v in values), dtype=bool, count=len(values))
+
+    # Filters take the projection and their resolved rule set and return a
+    # keep-mask over the whole wardrobe, or None when the rule set doesn't apply
+    def _filter_by_occasion(self, projected: Dict, requirements: Optional[Dict]) -> Optional[np.ndarray]:
+        """Mask of items suitable for the occasion"""
+        if requirements is None:
+            return None
         
-        if weather_condition not in self.weather_adjustments:
-            logger.info(f"   Unknown weather '{weather_condition}', keeping all items")
-            return items
+        # Formal enough, or in one of the occasion's colors
+        mask = projected['formality'] >= requirements['formality_min']
+        mask |= self._isin(projected['colors'], requirements['colors'])
+        return mask
+
+    def _filter_by_mood(self, projected: Dict, mood_style: Optional[Dict]) -> Optional[np.ndarray]:
+        """Mask of items that match the mood"""
+        if mood_style is None:
+            return None
         
-        adjustments = self.weather_adjustments[weather_condition]
-        if adjustments.get('neutral'):
-            logger.info("   Neutral weather, keeping all items")
-            return items
+        # Color match, or formality within one level of the mood
+        mask = self._isin(projected['colors'], mood_style['colors'])
+        mask |= np.abs(projected['formality'] - mood_style['formality']) <= 1
+        return mask
+
+    def _filter_by_weather(self, projected: Dict, adjustments: Optional[Dict]) -> Optional[np.ndarray]:
+        """Mask of items suitable for weather conditions"""
+        if adjustments is None:
+            return None
         
-        filtered = []
-        for item in items:
-            try:
-                # Avoid unsuitable categories
-                if 'avoid_categories' in adjustments and item.category and item.category.lower() in adjustments['avoid_categories']:
-                    continue
-                # Avoid unsuitable colors  
-                if 'avoid' in adjustments and item.color and item.color.lower() in adjustments['avoid']:
-                    continue
-                
-                # Prefer certain categories (add to front)
-                if 'prefer_categories' in adjustments and item.category and item.category.lower() in adjustments['prefer_categories']:
-                    filtered.insert(0, item)
-                else:
-                    filtered.append(item)
-                    
-            except Exception as e:
-                logger.warning(f"   Error processing item {getattr(item, 'item_id', 'unknown')}: {e}")
-                filtered.append(item)  # Include anyway
+        keep = np.ones(len(projected['items']), dtype=bool)
         
-        logger.info(f"   Weather filter result: {len(filtered)}/{len(items)} items")
-        return filtered if filtered else items
+        # Avoid unsuitable categories and colors
+        if 'avoid_categories' in adjustments:
+            keep &= ~self._isin(projected['categories'], adjustments['avoid_categories'])
+        if 'avoid' in adjustments:
+            keep &= ~self._isin(projected['colors'], adjustments['avoid'])
+        return keep
 
-    # Keep all your other existing methods with minimal changes...
-    def _categorize_items(self, items: List[ClothingItem]) -> Dict[str, List[ClothingItem]]:
+    def _categorize_items(self, projected: Dict, idx: np.ndarray) -> Dict[str, List[ClothingItem]]:
         """Categorize clothing items by type"""
         categories = {'tops': [], 'bottoms': [], 'outerwear': [], 'footwear': [], 'accessories': []}
+        items = projected['items']
         
-        for item in items:
-            try:
-                category = item.category.lower() if item.category else 'accessories'
-                
-                if category in self.essential_categories['tops']:
-                    categories['tops'].append(item)
-                elif category in self.essential_categories['bottoms']:
-                    categories['bottoms'].append(item)
-                elif category in self.essential_categories['outerwear']:
-                    categories['outerwear'].append(item)
-                elif category in self.essential_categories['footwear']:
-                    categories['footwear'].append(item)
-                else:
-                    categories['accessories'].append(item)
-                    
-            except Exception as e:
-                logger.warning(f"Error categorizing item: {e}")
-                categories['accessories'].append(item)
+        for i, category in zip(idx.tolist(), projected['categories'][idx]):
+            bucket = self._category_bucket.get(category, 'accessories')
+            categories[bucket].append(items[i])
         
         return categories
 
-    def _build_complete_outfit(self, categorized_items: Dict, mood: str, occasion: str) -> List[ClothingItem]:
-        """Build a complete outfit from categorized items"""
+    def _build_complete_outfit(self, categorized_items: Dict, mood: str, occasion: str, variant: int = 0) -> List[ClothingItem]:
+        """Build a complete outfit from categorized items, rotating to the variant-th item of each bucket"""
         outfit = []
         
+        def pick(bucket: str) -> ClothingItem:
+            items = categorized_items[bucket]
+            return items[variant % len(items)]
+        
         # Essential: Add a top
         if categorized_items['tops']:
-            outfit.append(categorized_items['tops'][0])
+            outfit.append(pick('tops'))
         
         # Essential: Add bottoms (unless we have a dress)
         if categorized_items['bottoms']:
             has_dress = any(getattr(item, 'category', '').lower() == 'dress' for item in outfit)
             if not has_dress:
-                outfit.append(categorized_items['bottoms'][0])
+                outfit.append(pick('bottoms'))
         
         # Add outerwear for formal occasions
         if occasion in ['work', 'formal', 'date'] and categorized_items['outerwear']:
-            outfit.append(categorized_items['outerwear'][0])
+            outfit.append(pick('outerwear'))
         
         # Add footwear
         if categorized_items['footwear']:
-            outfit.append(categorized_items['footwear'][0])
+            outfit.append(pick('footwear'))
         
         # Add accessories if space
         if categorized_items['accessories'] and len(outfit) < 4:
-            outfit.append(categorized_items['accessories'][0])
+            outfit.append(pick('accessories'))
         
         return outfit
 
-    def _calculate_confidence_score(self, outfit_items: List[Dict], mood: str, occasion: str) -> float:
-        """Calculate confidence score for outfit recommendation"""
+    def _finalize_outfit_metrics(self, outfit_items: List[Dict], mood: str) -> tuple:
+        """Confidence score, color harmony flag and style description in one pass over the items"""
         if not outfit_items:
-            return 0.0
+            return 0.0, True, "A simple outfit"
+        
+        neutral_colors = self._NEUTRAL_COLORS
+        categories = set()
+        color_counts = Counter()
+        non_neutral = 0
+        blank = 0
+        
+        for item in outfit_items:
+            categories.add(item['category'])
+            color = item['color']
+            if color:
+                color_counts[color] += 1
+            else:
+                blank += 1
+            if color.lower() not in neutral_colors:
+                non_neutral += 1
+        
+        # Colors coordinate if at most one is non-neutral; blank colors count
+        # against confidence but are ignored for the harmony flag
+        harmony = non_neutral - blank <= 1
         
         base_score = 0.6
         
         # Bonus for having multiple categories
-        categories = set(item['category'] for item in outfit_items)
         if len(categories) >= 2:
             base_score += 0.1
         if len(categories) >= 3:
             base_score += 0.1
         
         # Bonus for color coordination
-        colors = [item['color'] for item in outfit_items]
-        if self._colors_coordinate(colors):
+        if non_neutral <= 1:
             base_score += 0.1
         
-        return min(base_score, 1.0)
+        dominant_color = color_counts.most_common(1)[0][0] if color_counts else "neutral"
+        description = f"A stylish {dominant_color} ensemble perfect for a {mood} mood"
+        
+        return min(base_score, 1.0), harmony, description
 
-    def _colors_coordinate(self, colors: List[str]) -> bool:
-        """Check if colors coordinate well together"""
-        if not colors:
-            return True
+    def _score_recommendations(
+        self,
+        recommendations: List[Dict],
+        user_preferences: Dict,
+        mood: str,
+        occasion: str,
+        num_recommendations: Optional[int] = None
+    ) -> List[Dict]:
+        """Score, deduplicate and rank recommendations, returning the top num_recommendations"""
+        preferred_colors = frozenset(
+            color.lower() for color in (user_preferences or {}).get('preferred_colors') or ()
+        )
+        
+        n = len(recommendations)
+        confidence = np.fromiter(
+            (rec.get('confidence_score', 0.5) for rec in recommendations), dtype=np.float64, count=n
+        )
+        
+        # Preference bonus when any item is in a preferred color
+        pref_match = np.fromiter(
+            (bool(preferred_colors) and any(item['color'].lower() in preferred_colors for item in rec['items'])
+             for rec in recommendations),
+            dtype=np.bool_, count=n
+        )
+        
+        # AI enhancement bonus
+        ai_match = np.fromiter(
+            (rec.get('recommendation_method') == 'ai_enhanced' for rec in recommendations),
+            dtype=np.bool_, count=n
+        )
+        
+        for rec, score in zip(recommendations, _score_candidates(confidence, pref_match, ai_match).tolist()):
+            rec['final_score'] = score
+        
+        unique_recs = self._deduplicate_recommendations(recommendations)
+        logger.debug("🔄 After deduplication: %d unique recommendations", len(unique_recs))
+        
+        if num_recommendations is None:
+            num_recommendations = len(unique_recs)
+        return heapq.nlargest(num_recommendations, unique_recs, key=lambda x: x['final_score'])
+
+    def _deduplicate_recommendations(self, recommendations: List[Dict]) -> List[Dict]:
+        """Remove duplicate outfit recommendations, keeping the highest-scored copy of each"""
+        best = {}
+        failed = 0
+        
+        for i, rec in enumerate(recommendations):
+            try:
+                combo_signature = tuple(sorted(str(item['item_id']) for item in rec['items']))
+            except Exception:
+                failed += 1
+                combo_signature = ('__unkeyed__', i)  # Include anyway
             
-        neutral_colors = ['black', 'white', 'gray', 'grey', 'navy', 'beige', 'brown']
+            current = best.get(combo_signature)
+            if current is None or rec.get('final_score', 0) > current.get('final_score', 0):
+                best[combo_signature] = rec
         
-        # If all colors are neutral, they coordinate
-        neutral_count = sum(1 for color in colors if color.lower() in neutral_colors)
-        if neutral_count == len(colors):
-            return True
+        if failed:
+            logger.warning("Could not deduplicate %d recommendations", failed)
         
-        # If there's at most one non-neutral color, they coordinate
-        return (len(colors) - neutral_count) <= 1
+        return list(best.values())
 
-    def _generate_style_description(self, outfit_items: List[Dict], mood: str) -> str:
-        """Generate a description of the outfit style"""
-        if not outfit_items:
-            return "A simple outfit"
+    # AI-enhanced ranking: encode the request context once, embed every
+    # candidate (cached per item) and score them all with one matrix product
+    def _generate_ai_enhanced_recommendations(
+        self,
+        user_clothes: List[ClothingItem],
+        mood: str,
+        occasion: str,
+        weather: Dict,
+        user_preferences: Dict,
+        num_recommendations: int
+    ) -> List[Dict]:
+        """Build outfits from the items closest to the request context in embedding space"""
+        encoder = self.ai_models.get('text_encoder')
+        if encoder is None:
+            logger.debug("🤖 No text encoder loaded, skipping AI recommendations")
+            return []
         
-        colors = [item['color'] for item in outfit_items if item.get('color')]
-        dominant_color = max(set(colors), key=colors.count) if colors else "neutral"
+        projected = self._project_items(user_clothes)
+        items = projected['items']
+        if not items:
+            return []
         
-        return f"A stylish {dominant_color} ensemble perfect for a {mood} mood"
-
-    def _assess_color_harmony(self, outfit_items: List[Dict]) -> bool:
-        """Assess if the outfit has good color harmony"""
-        if not outfit_items:
-            return True
+        weather_condition = weather.get('condition', 'mild').lower() if weather else 'mild'
+        context = f"{mood} {occasion} outfit for {weather_condition} weather"
+        scores = self._score_items_against_context(encoder, items, context)
         
-        colors = [item['color'].lower() for item in outfit_items if item.get('color')]
-        return self._colors_coordinate(colors)
-
-    def _score_recommendations(self, recommendations: List[Dict], user_preferences: Dict, mood: str, occasion: str) -> List[Dict]:
-        """Score and rank recommendations"""
-        for rec in recommendations:
-            base_score = rec.get('confidence_score', 0.5)
-            
-            # Add preference bonuses
-            if user_preferences and 'preferred_colors' in user_preferences:
-                preferred_colors = user_preferences['preferred_colors']
-                outfit_colors = [item['color'].lower() for item in rec['items']]
-                
-                if any(color in preferred_colors for color in outfit_colors):
-                    base_score += 0.1
-            
-            # AI enhancement bonus
-            if rec.get('recommendation_method') == 'ai_enhanced':
-                base_score += 0.05
-            
-            rec['final_score'] = min(base_score, 1.0)
+        # Keep the best few candidates per outfit, best first
+        k = min(len(items), num_recommendations * 4)
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
         
-        return sorted(recommendations, key=lambda x: x['final_score'], reverse=True)
-
-    def _deduplicate_recommendations(self, recommendations: List[Dict]) -> List[Dict]:
-        """Remove duplicate outfit recommendations"""
-        seen_combinations = set()
-        unique_recs = []
+        categorized_items = self._categorize_items(projected, top)
+        candidates = [items[i] for i in top.tolist()]
         
-        for rec in recommendations:
-            try:
-                item_ids = sorted([str(item['item_id']) for item in rec['items']])
-                combo_signature = tuple(item_ids)
-                
-                if combo_signature not in seen_combinations:
-                    seen_combinations.add(combo_signature)
-                    unique_recs.append(rec)
-            except Exception as e:
-                logger.warning(f"Error deduplicating recommendation: {e}")
-                unique_recs.append(rec)  # Include anyway
-        
-        return unique_recs
-
-    # Placeholder for AI methods (implement later)
-    def _generate_ai_enhanced_recommendations(self, *args, **kwargs):
-        """Placeholder for AI-enhanced recommendations"""
-        logger.info("🤖 AI recommendations not implemented yet")
-        return []
+        recommendations = []
+        for variant in range(num_recommendations):
+            outfit = self._create_outfit_recommendation(
+                categorized_items, candidates, mood, occasion, variant
+            )
+            if outfit:
+                outfit['recommendation_method'] = 'ai_enhanced'
+                recommendations.append(outfit)
+        return recommendations
+
+    def _score_items_against_context(self, encoder, items: List[ClothingItem], context: str) -> np.ndarray:
+        """Cosine similarity of every item to the context, as one batched GEMV"""
+        texts = [f"{item.color or ''} {item.category or ''}".strip() for item in items]
+        
+        vectors = {}
+        with _item_embed_cache_lock:
+            for text in texts:
+                if text in _item_embed_cache:
+                    _item_embed_cache.move_to_end(text)
+                    vectors[text] = _item_embed_cache[text]
+        
+        # Encode only the descriptions we haven't seen, in a single batch
+        missing = list(dict.fromkeys(text for text in texts if text not in vectors))
+        if missing:
+            encoded = encoder.encode(missing, convert_to_numpy=True)
+            with _item_embed_cache_lock:
+                for text, vector in zip(missing, encoded):
+                    vectors[text] = _item_embed_cache[text] = np.asarray(vector, dtype=np.float32)
+                    _item_embed_cache.move_to_end(text)
+                while len(_item_embed_cache) > _ITEM_EMBED_CACHE_SIZE:
+                    _item_embed_cache.popitem(last=False)
+        
+        matrix = np.vstack([vectors[text] for text in texts])
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        
+        context_vec = np.asarray(encoder.encode([context], convert_to_numpy=True)[0], dtype=np.float32)
+        context_vec /= max(float(np.linalg.norm(context_vec)), 1e-12)
+        
+        return matrix @ context_vec
     
     def _load_ai_models(self):
         """Placeholder for AI model loading"""
-        logger.info("🤖 AI model loading not implemented yet")
-        pass
+        # Encoders go in self.ai_models['text_encoder']; they must be loaded
+        # once per process, never per engine, since engines are per request
+        logger.debug("🤖 AI model loading not implemented yet")
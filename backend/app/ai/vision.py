@@ -3,22 +3,206 @@ import cv2
 import numpy as np
 from typing import Dict, List, Optional
 import torch
-import torchvision.transforms as transforms
+from torchvision.transforms import v2
 from PIL import Image
+import copy
+import functools
+import hashlib
 import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from sklearn.cluster import KMeans
 
 # Try to import transformers (Hugging Face)
 try:
-    from transformers import pipeline
+    from transformers import pipeline, CLIPImageProcessor, CLIPModel
     HF_AVAILABLE = True
 except ImportError:
     HF_AVAILABLE = False
     logging.warning("Transformers not available. Install with: pip install transformers")
 
+# Try to import ONNX Runtime export/quantization (Hugging Face Optimum)
+try:
+    from optimum.onnxruntime import ORTModelForImageClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoImageProcessor
+    ORT_AVAILABLE = True
+except ImportError:
+    ORT_AVAILABLE = False
+
+# Optional GPU k-means backends, used only when CUDA is available
+try:
+    from libKMCUDA import kmeans_cuda
+    KMCUDA_AVAILABLE = True
+except ImportError:
+    KMCUDA_AVAILABLE = False
+
+try:
+    import faiss
+    FAISS_AVAILABLE = hasattr(faiss, 'StandardGpuResources')
+except ImportError:
+    FAISS_AVAILABLE = False
+
+# Try to import diskcache for the persistent analysis cache
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# (r_min, r_max, g_min, g_max, b_min, b_max) ranges for clothing colors,
+# checked in order; blues come first since they matter for jeans detection
+_COLOR_RANGES = [
+    # Blues (important for jeans detection)
+    ((20, 50, 80, 130, 150, 200), 'navy'),        # Dark blue
+    ((50, 100, 100, 150, 180, 220), 'blue'),      # Medium blue
+    ((30, 80, 60, 120, 140, 200), 'steel_blue'),  # Steel blue
+    ((70, 120, 90, 140, 160, 210), 'light_blue'), # Light blue
+    
+    # Other colors
+    ((0, 50, 0, 50, 0, 50), 'black'),
+    ((200, 255, 200, 255, 200, 255), 'white'),
+    ((100, 180, 100, 180, 100, 180), 'gray'),
+    ((150, 255, 0, 100, 0, 100), 'red'),
+    ((0, 100, 150, 255, 0, 100), 'green'),
+    ((150, 255, 150, 255, 0, 150), 'yellow'),
+    ((200, 255, 100, 180, 0, 100), 'orange'),
+    ((100, 180, 0, 100, 100, 200), 'purple'),
+    ((100, 200, 50, 150, 20, 80), 'brown'),
+    ((200, 255, 150, 220, 150, 220), 'pink')
+]
+
+# Fallback palette when no range matches
+_BASIC_COLORS = {
+    (0, 0, 0): 'black',
+    (255, 255, 255): 'white',
+    (128, 128, 128): 'gray',
+    (255, 0, 0): 'red',
+    (0, 255, 0): 'green',
+    (0, 0, 255): 'blue',
+    (255, 255, 0): 'yellow',
+    (255, 165, 0): 'orange',
+    (128, 0, 128): 'purple',
+    (165, 42, 42): 'brown',
+    (255, 192, 203): 'pink'
+}
+
+# Map various model outputs to StyleSync categories
+_CATEGORY_MAPPING = {
+    # Shirt variations
+    'shirt': 'shirt',
+    'top': 'shirt',
+    'blouse': 'shirt',
+    't-shirt': 'shirt',
+    'polo': 'shirt',
+    'button-up': 'shirt',
+    
+    # Pants variations
+    'pants': 'pants',
+    'trousers': 'pants',
+    'slacks': 'pants',
+    'chinos': 'pants',
+    
+    # Jeans variations
+    'jeans': 'jeans',
+    'denim': 'jeans',
+    'jean': 'jeans',
+    
+    # Dress variations
+    'dress': 'dress',
+    'gown': 'dress',
+    'sundress': 'dress',
+    
+    # Outerwear variations
+    'jacket': 'jacket',
+    'coat': 'jacket',
+    'blazer': 'jacket',
+    'cardigan': 'cardigan',
+    'sweater': 'sweater',
+    'hoodie': 'hoodie',
+    
+    # Footwear variations
+    'shoes': 'shoes',
+    'sneakers': 'shoes',
+    'boots': 'shoes',
+    'sandals': 'shoes',
+    'heels': 'shoes',
+    'flats': 'shoes',
+    
+    # Other items
+    'shorts': 'shorts',
+    'skirt': 'skirt',
+    'tank_top': 'tank_top'
+}
+
+# Keyword stems for complex labels, used when no mapping key matches
+_CATEGORY_KEYWORDS = {
+    'jean': 'jeans', 'denim': 'jeans',
+    'pant': 'pants', 'trouser': 'pants',
+    'shirt': 'shirt', 'top': 'shirt',
+    'dress': 'dress',
+    'shoe': 'shoes', 'boot': 'shoes', 'sneaker': 'shoes', 'sandal': 'shoes',
+    'jacket': 'jacket', 'coat': 'jacket'
+}
+
+# One alternation over every mapping key and keyword stem; longer
+# alternatives first so e.g. 'jeans' wins over 'jean' at the same position
+_CATEGORY_TERMS = {**_CATEGORY_KEYWORDS, **_CATEGORY_MAPPING}
+_CATEGORY_REGEX = re.compile(
+    '|'.join(re.escape(term) for term in sorted(_CATEGORY_TERMS, key=len, reverse=True))
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _map_label_to_category(cleaned: str) -> str:
+    """Category for a cleaned model label; models emit a small fixed label set"""
+    # Direct mapping first
+    category = _CATEGORY_MAPPING.get(cleaned)
+    if category is not None:
+        return category
+    
+    # Fuzzy matching for complex labels
+    match = _CATEGORY_REGEX.search(cleaned)
+    return _CATEGORY_TERMS[match.group(0)] if match else 'unknown'
+
+
+# Where exported INT8 ONNX models are kept between runs
+_ONNX_CACHE_DIR = Path(os.getenv("ONNX_MODEL_CACHE", "model_cache/onnx"))
+_ONNX_QUANTIZED_FILE = "model_quantized.onnx"
+# Written last into an export, so its presence means the export is complete
+_ONNX_COMPLETE_MARKER = ".complete"
+
+# Image embeddings (512-d, L2-normalized) stored in clothing_items.embedding
+# for pgvector similarity search
+_EMBEDDING_MODEL_ID = 'openai/clip-vit-base-patch32'
+
+# Images are shrunk to this size before dominant-color clustering, then
+# this many pixels are sampled from the thumbnail
+_COLOR_THUMBNAIL_SIZE = (128, 128)
+_COLOR_SAMPLE_SIZE = 8000
+
+# Color-name groups used by the heuristic classifier
+_BLUE_INDICATORS = frozenset({'blue', 'navy', 'indigo', 'steel_blue'})
+_DARK_INDICATORS = frozenset({'black', 'navy', 'brown', 'gray', 'dark_blue'})
+_BRIGHT_INDICATORS = frozenset({'red', 'pink', 'yellow', 'orange', 'bright_blue'})
+_DENIM_BLUE_INDICATORS = frozenset({'blue', 'navy', 'indigo'})
+
+# Analysis results are cached by image content. Bump _ANALYSIS_VERSION when
+# the pipeline changes in a way the lookup tables below don't capture.
+_ANALYSIS_VERSION = "2"
+_ANALYSIS_CACHE_DIR = os.getenv("VISION_CACHE_DIR", ".cache/vision")
+_ANALYSIS_MEMORY_CACHE_SIZE = 1024  # entries, when diskcache isn't installed
+_ANALYSIS_FINGERPRINT = hashlib.blake2b(
+    repr((_ANALYSIS_VERSION, _CATEGORY_MAPPING, _CATEGORY_KEYWORDS, _COLOR_RANGES, _BASIC_COLORS)).encode(),
+    digest_size=8
+).hexdigest()
+
 class ClothingVisionAnalyzer:
     """Advanced computer vision system for clothing recognition and analysis"""
     
@@ -41,28 +225,44 @@ class ClothingVisionAnalyzer:
     
     def setup_models(self):
         """Initialize computer vision models"""
+        # Color-name lookup tables, checked in order by _rgb_to_color_names_batch
+        self._range_lo = np.array([bounds[0::2] for bounds, _ in _COLOR_RANGES], dtype=np.int32)
+        self._range_hi = np.array([bounds[1::2] for bounds, _ in _COLOR_RANGES], dtype=np.int32)
+        self._range_names = np.array([name for _, name in _COLOR_RANGES])
+        self._basic_rgb = np.array(list(_BASIC_COLORS.keys()), dtype=np.int32)
+        self._basic_names = np.array(list(_BASIC_COLORS.values()))
+        
+        # Cluster colors on the GPU when a CUDA k-means backend is installed
+        self._kmeans_gpu = torch.cuda.is_available() and (KMCUDA_AVAILABLE or FAISS_AVAILABLE)
+        self._hf_load_lock = threading.Lock()
+        self._embedder = None  # {'model', 'processor'} once loaded
+        self._embedder_failed = False
+        
+        # Content-addressed analysis cache, shared across worker processes when on disk
+        self._analysis_cache = diskcache.Cache(_ANALYSIS_CACHE_DIR) if DISKCACHE_AVAILABLE else None
+        self._analysis_memory_cache = OrderedDict()
+        self._analysis_cache_lock = threading.Lock()
+        
         try:
-            # Basic PyTorch transforms
-            self.transform = transforms.Compose([
-                transforms.Resize((224, 224)),
-                transforms.ToTensor(),
-                transforms.Normalize(mean=[0.485, 0.456, 0.406], 
-                                   std=[0.229, 0.224, 0.225])
-            ])
+            # Basic PyTorch transforms; v2 works on uint8 tensors, so they
+            # can run on self.device after a single small upload
+            self.transform = self._build_transform(
+                (224, 224), mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]
+            )
             
             # Initialize Hugging Face models if available
             self.hf_models = {}
             if HF_AVAILABLE:
                 self._load_huggingface_models()
             
-            logger.info("Computer vision models loaded successfully")
+            logger.info("Computer vision models initialized successfully")
             
         except Exception as e:
             logger.error(f"Failed to load models: {e}")
             self.hf_models = {}
     
     def _load_huggingface_models(self):
-        """Load Hugging Face fashion classification models"""
+        """Register Hugging Face fashion classification models; weights load on first use"""
         model_configs = [
             {
                 'name': 'primary',
@@ -77,70 +277,143 @@ class ClothingVisionAnalyzer:
         ]
         
         for config in model_configs:
+            self.hf_models[config['name']] = {
+                'model_id': config['model_id'],
+                'priority': config['priority']
+            }
+    
+    def preload_models(self):
+        """Load every registered Hugging Face model now instead of on the first request"""
+        for model_name in list(self.hf_models):
+            self._ensure_model_loaded(model_name)
+        if HF_AVAILABLE:
+            self._ensure_embedder_loaded()
+    
+    def _ensure_model_loaded(self, model_name: str) -> Optional[Dict]:
+        """Load model_name's pipeline on first use; drops the model if loading fails"""
+        model_info = self.hf_models.get(model_name)
+        if model_info is None or 'model' in model_info:
+            return model_info
+        
+        with self._hf_load_lock:
+            # Another thread may have finished loading while we waited
+            model_info = self.hf_models.get(model_name)
+            if model_info is None or 'model' in model_info:
+                return model_info
+            
+            on_gpu = self.device.type == 'cuda'
             try:
-                model = pipeline(
-                    "image-classification",
-                    model=config['model_id'],
-                    use_fast=True,
-                    device=-1 
-                )
-                self.hf_models[config['name']] = {
-                    'model': model,
-                    'priority': config['priority']
-                }
-                logger.info(f"Loaded {config['name']} model successfully")
+                model = None
+                # INT8 ONNX Runtime only pays off on CPU
+                if ORT_AVAILABLE and not on_gpu:
+                    try:
+                        model = self._load_quantized_pipeline(model_info['model_id'])
+                    except Exception as e:
+                        logger.warning(f"ONNX export failed for {model_name}, using PyTorch: {e}")
                 
+                if model is None:
+                    model = pipeline(
+                        "image-classification",
+                        model=model_info['model_id'],
+                        use_fast=True,
+                        device=0 if on_gpu else -1
+                    )
+                if on_gpu:
+                    # Preprocess on the GPU with this model's own normalization
+                    processor = model.image_processor
+                    size = processor.size
+                    height = size.get('height') or size.get('shortest_edge', 224)
+                    model_info['transform'] = self._build_transform(
+                        (height, size.get('width') or height),
+                        mean=processor.image_mean, std=processor.image_std
+                    )
+                # Set last so other threads never see a half-initialized entry
+                model_info['model'] = model
+                logger.info(f"Loaded {model_name} model successfully")
+                return model_info
+                
+            except Exception as e:
+                logger.warning(f"Failed to load {model_name} model: {e}")
+                del self.hf_models[model_name]
+                return None
+    
+    def _ensure_embedder_loaded(self) -> Optional[Dict]:
+        """Load the CLIP image embedder on first use; gives up for good if loading fails"""
+        if self._embedder is not None or self._embedder_failed:
+            return self._embedder
+        
+        with self._hf_load_lock:
+            if self._embedder is not None or self._embedder_failed:
+                return self._embedder
+            try:
+                model = CLIPModel.from_pretrained(_EMBEDDING_MODEL_ID).to(self.device).eval()
+                processor = CLIPImageProcessor.from_pretrained(_EMBEDDING_MODEL_ID)
+                self._embedder = {'model': model, 'processor': processor}
+                logger.info("Loaded embedding model successfully")
             except Exception as e:
-                logger.warning(f"Failed to load {config['name']} model: {e}")
+                logger.warning(f"Failed to load embedding model: {e}")
+                self._embedder_failed = True
+            return self._embedder
+    
+    @staticmethod
+    def _build_transform(size, mean, std):
+        """Resize + scale + normalize pipeline for uint8 CHW tensors"""
+        return v2.Compose([
+            v2.Resize(size, antialias=True),
+            v2.ToDtype(torch.float32, scale=True),
+            v2.Normalize(mean=mean, std=std)
+        ])
+    
+    def _load_quantized_pipeline(self, model_id: str):
+        """Image-classification pipeline over an INT8 ONNX Runtime export of model_id"""
+        save_dir = _ONNX_CACHE_DIR / model_id.replace('/', '__')
+        
+        # Export and quantize on first use; later runs load the cached artifact
+        if not (save_dir / _ONNX_COMPLETE_MARKER).exists():
+            self._export_quantized_model(model_id, save_dir)
+        
+        model = ORTModelForImageClassification.from_pretrained(
+            save_dir, file_name=_ONNX_QUANTIZED_FILE, provider="CPUExecutionProvider"
+        )
+        image_processor = AutoImageProcessor.from_pretrained(save_dir)
+        return pipeline("image-classification", model=model, image_processor=image_processor)
+    
+    @staticmethod
+    def _export_quantized_model(model_id: str, save_dir: Path):
+        """Export and quantize model_id into save_dir, safely across processes
+        
+        Vision workers can all start cold at once, so each builds in its own
+        temporary directory and renames it into place when complete.
+        """
+        save_dir.parent.mkdir(parents=True, exist_ok=True)
+        build_dir = Path(tempfile.mkdtemp(prefix=f".{save_dir.name}-", dir=save_dir.parent))
+        try:
+            ort_model = ORTModelForImageClassification.from_pretrained(
+                model_id, export=True, provider="CPUExecutionProvider"
+            )
+            quantizer = ORTQuantizer.from_pretrained(ort_model)
+            quantizer.quantize(
+                save_dir=build_dir,
+                quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+            )
+            AutoImageProcessor.from_pretrained(model_id).save_pretrained(build_dir)
+            (build_dir / _ONNX_COMPLETE_MARKER).touch()
+            
+            # Left behind by an export that was interrupted part way
+            if save_dir.exists() and not (save_dir / _ONNX_COMPLETE_MARKER).exists():
+                shutil.rmtree(save_dir, ignore_errors=True)
+            try:
+                os.replace(build_dir, save_dir)
+            except OSError:
+                # Another worker finished first; its export is just as good
+                if not (save_dir / _ONNX_COMPLETE_MARKER).exists():
+                    raise
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
     
     def _create_category_mapping(self):
         """Map various model outputs to StyleSync categories"""
-        return {
-            # Shirt variations
-            'shirt': 'shirt',
-            'top': 'shirt',
-            'blouse': 'shirt',
-            't-shirt': 'shirt',
-            'polo': 'shirt',
-            'button-up': 'shirt',
-            
-            # Pants variations
-            'pants': 'pants',
-            'trousers': 'pants',
-            'slacks': 'pants',
-            'chinos': 'pants',
-            
-            # Jeans variations
-            'jeans': 'jeans',
-            'denim': 'jeans',
-            'jean': 'jeans',
-            
-            # Dress variations
-            'dress': 'dress',
-            'gown': 'dress',
-            'sundress': 'dress',
-            
-            # Outerwear variations
-            'jacket': 'jacket',
-            'coat': 'jacket',
-            'blazer': 'jacket',
-            'cardigan': 'cardigan',
-            'sweater': 'sweater',
-            'hoodie': 'hoodie',
-            
-            # Footwear variations
-            'shoes': 'shoes',
-            'sneakers': 'shoes',
-            'boots': 'shoes',
-            'sandals': 'shoes',
-            'heels': 'shoes',
-            'flats': 'shoes',
-            
-            # Other items
-            'shorts': 'shorts',
-            'skirt': 'skirt',
-            'tank_top': 'tank_top'
-        }
+        return dict(_CATEGORY_MAPPING)
     
     def analyze_clothing_image(self, image_path: str) -> Dict:
         """
@@ -153,47 +426,190 @@ class ClothingVisionAnalyzer:
             Dict containing analysis results
         """
         try:
+            # Load models first so the cache key names exactly the models that will run
+            self.preload_models()
+            
+            # Identical pixels give identical results, so look up by content first
+            data = Path(image_path).read_bytes()
+            cache_key = self._analysis_cache_key(data)
+            cached = self._analysis_cache_get(cache_key)
+            if cached is not None:
+                return cached
+            
             # Load and preprocess image
-            image = Image.open(image_path).convert('RGB')
-            image_np = np.array(image)
+            image_np = self._decode_image(data, image_path)
+            
+            # Shared features, computed once for classification and analysis
+            colors, aspect_ratio = self._extract_image_features(image_np)
             
             # Multi-method classification
-            classification_result = self._classify_clothing_comprehensive(image)
+            failed_models = []
+            classification_result = self._classify_clothing_comprehensive(
+                image_np, colors, aspect_ratio, failed_models
+            )
+            embedding = self._embed_images([image_np])[0]
             
-            # Extract additional features
-            colors = self._extract_dominant_colors(image_np)
-            formality = self._assess_formality_level(image_np, classification_result['category'])
-            season = self._determine_season_suitability(classification_result['category'], colors)
-            style_attrs = self._extract_style_attributes(image_np, classification_result['category'])
-            
-            return {
-                'category': classification_result['category'],
-                'subcategory': self._get_subcategory(classification_result['category']),
-                'dominant_colors': colors,
-                'formality_level': formality,
-                'season_suitability': season,
-                'style_attributes': style_attrs,
-                'confidence_score': classification_result['confidence'],
-                'classification_method': classification_result['method'],
-                'raw_predictions': classification_result.get('raw_predictions', [])
-            }
+            analysis = self._build_analysis(image_np, colors, classification_result, embedding)
+            if self._is_cacheable(analysis, failed_models):
+                self._analysis_cache_put(cache_key, analysis)
+            return analysis
             
         except Exception as e:
             logger.error(f"Image analysis failed: {e}")
             return self._get_default_analysis()
     
-    def _classify_clothing_comprehensive(self, image: Image) -> Dict:
-        """Comprehensive classification using multiple methods"""
-        results = []
+    def analyze_clothing_images(self, image_paths: List[str]) -> List[Dict]:
+        """
+        Analyze several clothing images, running each model once over the whole batch
+        
+        Args:
+            image_paths: Paths to clothing images
+            
+        Returns:
+            List of analysis results in the same order as image_paths
+        """
+        # Load models first so the cache keys name exactly the models that will run
+        self.preload_models()
+        
+        results = [None] * len(image_paths)
+        pending = []  # (index, cache_key, image_np) for images not in the cache
+        for i, image_path in enumerate(image_paths):
+            try:
+                data = Path(image_path).read_bytes()
+                cache_key = self._analysis_cache_key(data)
+                results[i] = self._analysis_cache_get(cache_key)
+                if results[i] is None:
+                    pending.append((i, cache_key, self._decode_image(data, image_path)))
+            except Exception as e:
+                logger.error(f"Image analysis failed for {image_path}: {e}")
+                results[i] = self._get_default_analysis()
+        
+        failed_models = []
+        hf_results = (
+            self._classify_with_huggingface_batch([image_np for _, _, image_np in pending], failed_models)
+            if self.hf_models and pending
+            else [None] * len(pending)
+        )
+        embeddings = self._embed_images([image_np for _, _, image_np in pending]) if pending else []
+        
+        for (i, cache_key, image_np), hf_result, embedding in zip(pending, hf_results, embeddings):
+            try:
+                colors, aspect_ratio = self._extract_image_features(image_np)
+                classification_result = self._combine_classifications(
+                    hf_result, image_np, colors, aspect_ratio
+                )
+                results[i] = self._build_analysis(image_np, colors, classification_result, embedding)
+                if self._is_cacheable(results[i], failed_models):
+                    self._analysis_cache_put(cache_key, results[i])
+            except Exception as e:
+                logger.error(f"Image analysis failed: {e}")
+                results[i] = self._get_default_analysis()
+        
+        return results
+    
+    @staticmethod
+    def _decode_image(data: bytes, image_path: str) -> np.ndarray:
+        """Decode encoded image bytes straight to an RGB uint8 array"""
+        image_bgr = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image_bgr is None:
+            raise ValueError(f"Could not read image {image_path}")
+        return cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB, dst=image_bgr)
+    
+    def _analysis_cache_key(self, data: bytes) -> str:
+        """Content hash of the image plus everything else that determines its analysis"""
+        models = ','.join(f"{name}={info['model_id']}" for name, info in sorted(self.hf_models.items()))
+        if HF_AVAILABLE and not self._embedder_failed:
+            models += f",embedding={_EMBEDDING_MODEL_ID}"
+        content_hash = hashlib.blake2b(data, digest_size=16).hexdigest()
+        return f"{content_hash}:{_ANALYSIS_FINGERPRINT}:{models}"
+    
+    def _is_cacheable(self, analysis: Dict, failed_models: List[str]) -> bool:
+        """Whether an analysis is what its cache key promises, rather than a degraded fallback"""
+        if failed_models:
+            return False
+        # The key names the embedder unless it failed to load for good
+        embedding_expected = HF_AVAILABLE and not self._embedder_failed
+        return analysis.get('embedding') is not None or not embedding_expected
+    
+    def _analysis_cache_get(self, cache_key: str) -> Optional[Dict]:
+        if self._analysis_cache is not None:
+            return self._analysis_cache.get(cache_key)
+        with self._analysis_cache_lock:
+            analysis = self._analysis_memory_cache.get(cache_key)
+            if analysis is None:
+                return None
+            self._analysis_memory_cache.move_to_end(cache_key)
+        return copy.deepcopy(analysis)
+    
+    def _analysis_cache_put(self, cache_key: str, analysis: Dict):
+        if self._analysis_cache is not None:
+            self._analysis_cache.set(cache_key, analysis)
+            return
+        with self._analysis_cache_lock:
+            self._analysis_memory_cache[cache_key] = copy.deepcopy(analysis)
+            self._analysis_memory_cache.move_to_end(cache_key)
+            if len(self._analysis_memory_cache) > _ANALYSIS_MEMORY_CACHE_SIZE:
+                self._analysis_memory_cache.popitem(last=False)
+    
+    def _extract_image_features(self, image_np: np.ndarray) -> tuple:
+        """Dominant colors and aspect ratio, shared by every analysis step"""
+        height, width = image_np.shape[:2]
+        colors = self._extract_named_dominant_colors(image_np)
+        return colors, height / width
+    
+    def _build_analysis(
+        self,
+        image_np: np.ndarray,
+        colors: List[str],
+        classification_result: Dict,
+        embedding: Optional[List[float]] = None
+    ) -> Dict:
+        """Extract the remaining features and assemble the analysis for a classified image"""
+        # Extract additional features
+        formality = self._assess_formality_level(image_np, classification_result['category'])
+        season = self._determine_season_suitability(classification_result['category'], colors)
+        style_attrs = self._extract_style_attributes(image_np, classification_result['category'])
         
+        return {
+            'category': classification_result['category'],
+            'subcategory': self._get_subcategory(classification_result['category']),
+            'dominant_colors': colors,
+            'formality_level': formality,
+            'season_suitability': season,
+            'style_attributes': style_attrs,
+            'confidence_score': classification_result['confidence'],
+            'classification_method': classification_result['method'],
+            'raw_predictions': classification_result.get('raw_predictions', []),
+            'embedding': embedding
+        }
+    
+    def _classify_clothing_comprehensive(
+        self,
+        image_np: np.ndarray,
+        colors: Optional[List[str]] = None,
+        aspect_ratio: Optional[float] = None,
+        failed_models: Optional[List[str]] = None
+    ) -> Dict:
+        """Comprehensive classification using multiple methods"""
         # Method 1: Hugging Face models
-        if self.hf_models:
-            hf_result = self._classify_with_huggingface(image)
-            if hf_result:
-                results.append(hf_result)
+        hf_result = self._classify_with_huggingface(image_np, failed_models) if self.hf_models else None
+        
+        return self._combine_classifications(hf_result, image_np, colors, aspect_ratio)
+    
+    def _combine_classifications(
+        self,
+        hf_result: Optional[Dict],
+        image_np: np.ndarray,
+        colors: Optional[List[str]] = None,
+        aspect_ratio: Optional[float] = None
+    ) -> Dict:
+        """Combine a Hugging Face result (if any) with heuristic classification"""
+        results = []
+        if hf_result:
+            results.append(hf_result)
         
         # Method 2: Enhanced heuristic classification
-        heuristic_result = self._classify_clothing_heuristic(image)
+        heuristic_result = self._classify_clothing_heuristic(image_np, colors, aspect_ratio)
         results.append(heuristic_result)
         
         # Combine results using ensemble method
@@ -202,17 +618,48 @@ class ClothingVisionAnalyzer:
         else:
             return results[0] if results else self._get_default_classification()
     
-    def _classify_with_huggingface(self, image: Image) -> Optional[Dict]:
+    def _classify_with_huggingface(
+        self, image_np: np.ndarray, failed_models: Optional[List[str]] = None
+    ) -> Optional[Dict]:
         """Classify using Hugging Face models"""
+        return self._classify_with_huggingface_batch([image_np], failed_models)[0]
+    
+    def _classify_with_huggingface_batch(
+        self, images: List[np.ndarray], failed_models: Optional[List[str]] = None
+    ) -> List[Optional[Dict]]:
+        """Classify a batch of RGB arrays, calling each Hugging Face model once for the whole batch
+        
+        Names of models that could not run are appended to failed_models.
+        """
+        if failed_models is None:
+            failed_models = []
+        best_results = [None] * len(images)
         try:
-            best_result = None
-            best_confidence = 0
+            best_confidences = [0] * len(images)
+            pil_images = None  # built only if a PIL-based pipeline needs them
             
-            for model_name, model_info in self.hf_models.items():
+            for model_name in list(self.hf_models):
+                model_info = self._ensure_model_loaded(model_name)
+                if model_info is None:
+                    failed_models.append(model_name)
+                    continue
                 try:
-                    # Get predictions
-                    predictions = model_info['model'](image)
-                    
+                    # Get predictions for every image in one call
+                    if 'transform' in model_info:
+                        batch_predictions = self._predict_on_device(model_info, images)
+                    else:
+                        if pil_images is None:
+                            pil_images = [Image.fromarray(image_np) for image_np in images]
+                        # The pipeline only disables grad; inference_mode also skips
+                        # autograd version-counter bookkeeping
+                        with torch.inference_mode():
+                            batch_predictions = model_info['model'](pil_images, batch_size=min(32, len(pil_images)))
+                except Exception as e:
+                    logger.warning(f"Model {model_name} failed: {e}")
+                    failed_models.append(model_name)
+                    continue
+                
+                for i, predictions in enumerate(batch_predictions):
                     # Process top prediction
                     top_pred = predictions[0]
                     raw_label = top_pred['label'].lower()
@@ -221,68 +668,79 @@ class ClothingVisionAnalyzer:
                     # Map to StyleSync category
                     category = self._map_prediction_to_category(raw_label)
                     
-                    if confidence > best_confidence and category != 'unknown':
-                        best_result = {
+                    if confidence > best_confidences[i] and category != 'unknown':
+                        best_results[i] = {
                             'category': category,
                             'confidence': confidence,
                             'method': f'huggingface_{model_name}',
                             'raw_prediction': raw_label,
                             'model_used': model_name
                         }
-                        best_confidence = confidence
-                
-                except Exception as e:
-                    logger.warning(f"Model {model_name} failed: {e}")
-                    continue
+                        best_confidences[i] = confidence
             
-            return best_result
+            return best_results
             
         except Exception as e:
             logger.error(f"Hugging Face classification failed: {e}")
-            return None
+            failed_models.append('huggingface')
+            return [None] * len(images)
     
-    def _map_prediction_to_category(self, raw_prediction: str) -> str:
-        """Map raw model prediction to StyleSync category"""
-        # Clean the prediction
-        cleaned = raw_prediction.lower().strip()
-        
-        # Direct mapping first
-        if cleaned in self.category_mapping:
-            return self.category_mapping[cleaned]
+    def _predict_on_device(self, model_info: Dict, images: List[np.ndarray]) -> List[List[Dict]]:
+        """Top prediction per image, preprocessing on self.device instead of in the pipeline"""
+        hf_pipeline = model_info['model']
+        transform = model_info['transform']
         
-        # Fuzzy matching for complex labels
-        for pattern, category in self.category_mapping.items():
-            if pattern in cleaned or cleaned in pattern:
-                return category
-        
-        # Special handling for common patterns
-        if 'jean' in cleaned or 'denim' in cleaned:
-            return 'jeans'
-        elif 'pant' in cleaned or 'trouser' in cleaned:
-            return 'pants'
-        elif 'shirt' in cleaned or 'top' in cleaned:
-            return 'shirt'
-        elif 'dress' in cleaned:
-            return 'dress'
-        elif 'shoe' in cleaned or 'boot' in cleaned or 'sneaker' in cleaned:
-            return 'shoes'
-        elif 'jacket' in cleaned or 'coat' in cleaned:
-            return 'jacket'
+        with torch.inference_mode():
+            # Upload uint8 pixels (4x smaller than float32) and convert on the device
+            pixel_values = torch.stack([
+                transform(torch.from_numpy(image_np).permute(2, 0, 1).to(self.device, non_blocking=True))
+                for image_np in images
+            ])
+            probs = hf_pipeline.model(pixel_values=pixel_values).logits.softmax(-1)
+            scores, label_ids = probs.max(-1)
         
-        return 'unknown'
+        id2label = hf_pipeline.model.config.id2label
+        return [
+            [{'label': id2label[label_id], 'score': score}]
+            for label_id, score in zip(label_ids.tolist(), scores.tolist())
+        ]
+    
+    def _embed_images(self, images: List[np.ndarray]) -> List[Optional[List[float]]]:
+        """Unit-length CLIP image embeddings for a batch of RGB arrays, None where unavailable"""
+        embedder = self._ensure_embedder_loaded() if HF_AVAILABLE else None
+        if embedder is None:
+            return [None] * len(images)
+        try:
+            with torch.inference_mode():
+                inputs = embedder['processor'](images=images, return_tensors='pt').to(self.device)
+                features = embedder['model'].get_image_features(**inputs)
+                features = torch.nn.functional.normalize(features, dim=-1)
+            return features.cpu().tolist()
+        except Exception as e:
+            logger.warning(f"Image embedding failed: {e}")
+            return [None] * len(images)
     
-    def _classify_clothing_heuristic(self, image: Image) -> Dict:
-        """Enhanced heuristic classification"""
+    def _map_prediction_to_category(self, raw_prediction: str) -> str:
+        """Map raw model prediction to StyleSync category"""
+        return _map_label_to_category(raw_prediction.lower().strip())
+    
+    def _classify_clothing_heuristic(
+        self,
+        image_np: np.ndarray,
+        colors: Optional[List[str]] = None,
+        aspect_ratio: Optional[float] = None
+    ) -> Dict:
+        """Enhanced heuristic classification, reusing features the caller already extracted"""
         try:
-            # Convert PIL image to numpy array for analysis
-            image_np = np.array(image)
             height, width = image_np.shape[:2]
             
             # Calculate aspect ratio
-            aspect_ratio = height / width
+            if aspect_ratio is None:
+                aspect_ratio = height / width
             
             # Extract dominant colors
-            colors = self._extract_dominant_colors(image_np, k=5)
+            if colors is None:
+                colors = self._extract_named_dominant_colors(image_np, k=5)
             
             # Enhanced classification logic
             category = self._determine_category_from_features(
@@ -312,15 +770,10 @@ class ClothingVisionAnalyzer:
     def _determine_category_from_features(self, aspect_ratio: float, colors: List[str], image_np: np.ndarray) -> str:
         """Determine clothing category from visual features"""
         
-        # Color-based indicators
-        blue_indicators = ['blue', 'navy', 'indigo', 'steel_blue']
-        dark_indicators = ['black', 'navy', 'brown', 'gray', 'dark_blue']
-        bright_indicators = ['red', 'pink', 'yellow', 'orange', 'bright_blue']
-        
         # Check for blue colors (strong jeans indicator)
-        has_blue = any(color in blue_indicators for color in colors)
-        has_dark = any(color in dark_indicators for color in colors)
-        has_bright = any(color in bright_indicators for color in colors)
+        has_blue = not _BLUE_INDICATORS.isdisjoint(colors)
+        has_dark = not _DARK_INDICATORS.isdisjoint(colors)
+        has_bright = not _BRIGHT_INDICATORS.isdisjoint(colors)
         
         # Aspect ratio analysis
         is_very_tall = aspect_ratio > 1.5  # Very tall items
@@ -329,7 +782,7 @@ class ClothingVisionAnalyzer:
         is_square = 0.8 <= aspect_ratio <= 1.2  # Square-ish items
         
         # Advanced color analysis
-        blue_dominance = sum(1 for color in colors if color in blue_indicators)
+        blue_dominance = sum(1 for color in colors if color in _BLUE_INDICATORS)
         total_colors = len(colors)
         blue_ratio = blue_dominance / total_colors if total_colors > 0 else 0
         
@@ -356,8 +809,7 @@ class ClothingVisionAnalyzer:
         base_confidence = 0.6
         
         # Boost confidence for strong indicators
-        blue_indicators = ['blue', 'navy', 'indigo']
-        has_blue = any(color in blue_indicators for color in colors)
+        has_blue = not _DENIM_BLUE_INDICATORS.isdisjoint(colors)
         
         if category == 'jeans' and has_blue and aspect_ratio > 1.2:
             base_confidence += 0.2
@@ -410,82 +862,77 @@ class ClothingVisionAnalyzer:
         best_result['ensemble_results'] = results
         return best_result
     
-    def _extract_dominant_colors(self, image_np: np.ndarray, k: int = 5) -> List[str]:
-        """Extract dominant colors from clothing image"""
-        # Reshape image for color analysis
-        pixels = image_np.reshape(-1, 3)
+    def _extract_named_dominant_colors(self, image_np: np.ndarray, k: int = 5) -> List[str]:
+        """Names of the three most dominant colors in a clothing image, most dominant first"""
+        # Downscale once; dominant colors survive area averaging and k-means
+        # cost scales with the number of pixels
+        if image_np.shape[0] * image_np.shape[1] > _COLOR_THUMBNAIL_SIZE[0] * _COLOR_THUMBNAIL_SIZE[1]:
+            image_np = cv2.resize(image_np, _COLOR_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+        
+        # Reshape image for color analysis and cluster a fixed-size random
+        # sample of pixels; dominant colors don't need every pixel
+        flat = image_np.reshape(-1, 3)
+        idx = np.random.default_rng(42).integers(0, flat.shape[0], size=min(_COLOR_SAMPLE_SIZE, flat.shape[0]))
+        # float32 is what every k-means backend computes in; never promote to float64
+        pixels = flat[idx].astype(np.float32)
         
         # Use k-means to find dominant colors
-        kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-        kmeans.fit(pixels)
-        
-        # Convert RGB to color names
-        colors = []
-        for color in kmeans.cluster_centers_:
-            color_name = self._rgb_to_color_name(color)
-            colors.append(color_name)
-        
-        return colors[:3]  # Return top 3 colors
-    
-    def _rgb_to_color_name(self, rgb: np.ndarray) -> str:
-        """Convert RGB values to color name with enhanced blue detection"""
-        r, g, b = rgb.astype(int)
-        
-        # Enhanced color mapping for better clothing detection
-        color_ranges = [
-            # Blues (important for jeans detection)
-            ((20, 50, 80, 130, 150, 200), 'navy'),        # Dark blue
-            ((50, 100, 100, 150, 180, 220), 'blue'),      # Medium blue
-            ((30, 80, 60, 120, 140, 200), 'steel_blue'),  # Steel blue
-            ((70, 120, 90, 140, 160, 210), 'light_blue'), # Light blue
-            
-            # Other colors
-            ((0, 50, 0, 50, 0, 50), 'black'),
-            ((200, 255, 200, 255, 200, 255), 'white'),
-            ((100, 180, 100, 180, 100, 180), 'gray'),
-            ((150, 255, 0, 100, 0, 100), 'red'),
-            ((0, 100, 150, 255, 0, 100), 'green'),
-            ((150, 255, 150, 255, 0, 150), 'yellow'),
-            ((200, 255, 100, 180, 0, 100), 'orange'),
-            ((100, 180, 0, 100, 100, 200), 'purple'),
-            ((100, 200, 50, 150, 20, 80), 'brown'),
-            ((200, 255, 150, 220, 150, 220), 'pink')
-        ]
+        k = min(k, len(pixels))
+        centers, labels = self._kmeans(pixels, k)
+        
+        # Name only the three largest clusters, largest first
+        counts = np.bincount(np.asarray(labels).ravel(), minlength=k)
+        top = np.argsort(-counts, kind='stable')[:3]
+        return self._rgb_to_color_names_batch(centers[top])
+    
+    def _kmeans(self, pixels: np.ndarray, k: int) -> tuple:
+        """(centers, labels) for an (N, 3) pixel array, on the GPU when available"""
+        data = np.ascontiguousarray(pixels, dtype=np.float32)
+        centers = None
+        if self._kmeans_gpu:
+            try:
+                if KMCUDA_AVAILABLE:
+                    centers, labels = kmeans_cuda(data, k, tolerance=0.01, init="k-means++", seed=42, device=0)
+                else:
+                    kmeans = faiss.Kmeans(data.shape[1], k, niter=20, seed=42, gpu=True)
+                    kmeans.train(data)
+                    centers = kmeans.centroids
+                    _, labels = kmeans.index.search(data, 1)
+                # Empty clusters come back as NaN rows
+                centers = np.nan_to_num(centers)
+            except Exception as e:
+                logger.warning(f"GPU k-means failed, falling back to CPU: {e}")
+                centers = None
+        
+        if centers is None:
+            # OpenCV's Lloyd loop runs entirely in C++; seed its RNG so
+            # k-means++ seeding is reproducible
+            cv2.setRNGSeed(42)
+            criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
+            _, labels, centers = cv2.kmeans(data, k, None, criteria, 1, cv2.KMEANS_PP_CENTERS)
+        
+        return centers, labels
+    
+    def _rgb_to_color_names_batch(self, centroids: np.ndarray) -> List[str]:
+        """Convert a (k, 3) array of RGB values to color names in one vectorized pass"""
+        rgb = centroids.astype(np.int32)
+        r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
         
         # Special handling for denim/jeans colors
-        if 40 <= b <= 120 and b > r and b > g and r < 80 and g < 80:
-            return 'navy'  # Classic jeans color
-        
-        # Check color ranges
-        for (r_min, r_max, g_min, g_max, b_min, b_max), color_name in color_ranges:
-            if r_min <= r <= r_max and g_min <= g <= g_max and b_min <= b <= b_max:
-                return color_name
-        
-        # Fallback to closest basic color
-        basic_colors = {
-            (0, 0, 0): 'black',
-            (255, 255, 255): 'white',
-            (128, 128, 128): 'gray',
-            (255, 0, 0): 'red',
-            (0, 255, 0): 'green',
-            (0, 0, 255): 'blue',
-            (255, 255, 0): 'yellow',
-            (255, 165, 0): 'orange',
-            (128, 0, 128): 'purple',
-            (165, 42, 42): 'brown',
-            (255, 192, 203): 'pink'
-        }
+        denim = (40 <= b) & (b <= 120) & (b > r) & (b > g) & (r < 80) & (g < 80)
         
-        min_distance = float('inf')
-        closest_color = 'gray'
+        # First matching color range per row
+        in_range = ((rgb[:, None, :] >= self._range_lo) & (rgb[:, None, :] <= self._range_hi)).all(-1)
+        matched = in_range.any(axis=1)
+        first_match = self._range_names[in_range.argmax(axis=1)]
         
-        for color_rgb, color_name in basic_colors.items():
-            distance = np.sqrt(sum((a - b) ** 2 for a, b in zip((r, g, b), color_rgb)))
-            if distance < min_distance:
-                min_distance = distance
-                closest_color = color_name
+        # Fallback to closest basic color; squared distance has the same argmin
+        diffs = rgb[:, None, :] - self._basic_rgb[None, :, :]
+        distances = np.einsum('ijk,ijk->ij', diffs, diffs)
+        closest = self._basic_names[distances.argmin(axis=1)]
         
-        return closest_color
+        names = np.where(denim, 'navy', np.where(matched, first_match, closest))
+        return names.tolist()
     
     def _get_subcategory(self, category: str) -> str:
         """Get subcategory based on main category"""
@@ -578,6 +1025,30 @@ class ClothingVisionAnalyzer:
         return {
             'device': str(self.device),
             'huggingface_available': HF_AVAILABLE,
-            'loaded_models': list(self.hf_models.keys()),
+            'loaded_models': [name for name, info in self.hf_models.items() if 'model' in info],
             'supported_categories': len(self.clothing_categories)
         }
+
+
+@functools.lru_cache(maxsize=1)
+def get_analyzer() -> ClothingVisionAnalyzer:
+    """Process-wide analyzer, so model weights are loaded at most once"""
+    return ClothingVisionAnalyzer()
+
+
+def init_analyzer():
+    """Process-pool initializer: build this worker's analyzer and load its models up front"""
+    # Parallelism comes from the worker processes, so keep each one single-threaded
+    torch.set_num_threads(1)
+    cv2.setNumThreads(1)
+    get_analyzer().preload_models()
+
+
+def analyze(image_path: str) -> Dict:
+    """Picklable entry point for analyzing one image in a worker process"""
+    return get_analyzer().analyze_clothing_image(image_path)
+
+
+def analyze_batch(image_paths: List[str]) -> List[Dict]:
+    """Picklable entry point for analyzing a batch of images in a worker process"""
+    return get_analyzer().analyze_clothing_images(image_paths)
@@ -0,0 +1,37 @@
+# app/dependencies.py
+import logging
+import os
+from functools import lru_cache
+from fastapi import Request
+from app.ai.color_analysis import ColorAnalyzer
+from app.ai.recommendations import OutfitRecommendationEngine
+
+# Try to import the asyncio Redis client for response caching
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    logging.warning("Redis not available. Install with: pip install redis")
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+# The analyzers hold no per-request state, so one instance per process is
+# shared by every request (and by background tasks)
+
+@lru_cache(maxsize=1)
+def get_color_analyzer() -> ColorAnalyzer:
+    return ColorAnalyzer()
+
+@lru_cache(maxsize=1)
+def get_recommendation_engine() -> OutfitRecommendationEngine:
+    return OutfitRecommendationEngine()
+
+def create_redis():
+    """Redis client for the app's lifetime, or None when caching isn't configured"""
+    if REDIS_AVAILABLE and REDIS_URL:
+        return aioredis.from_url(REDIS_URL)
+    return None
+
+def get_redis(request: Request):
+    return getattr(request.app.state, "redis", None)
@@ -1,22 +1,66 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from app.routers import clothing, recommendations, users
+from app.ai.vision import get_analyzer, init_analyzer
+from app.dependencies import create_redis, get_color_analyzer, get_recommendation_engine
 from app.database.connection import engine
 from app.models.user import Base
-from pathlib import Path
+from sqlalchemy import text
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema is managed by Alembic (`alembic upgrade head`); AUTO_CREATE_TABLES=1
+    # creates missing tables at startup for local development
+    if os.getenv("AUTO_CREATE_TABLES") == "1":
+        with engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        Base.metadata.create_all(bind=engine)
+    
+    # Build the shared analyzers before the first request instead of during it
+    get_color_analyzer()
+    get_recommendation_engine()
+    app.state.redis = create_redis()
+    
+    # Image analysis is CPU-bound, so it runs in worker processes that each
+    # load the vision models once at startup. VISION_WORKERS=0 keeps it
+    # in-process on a thread pool instead.
+    workers = int(os.getenv("VISION_WORKERS", os.cpu_count() or 1))
+    if workers > 0:
+        # spawn, not fork: CUDA and torch's thread pools don't survive fork
+        app.state.cpu_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_analyzer
+        )
+    else:
+        get_analyzer().preload_models()
+    
+    yield
+    
+    cpu_pool = getattr(app.state, "cpu_pool", None)
+    if cpu_pool is not None:
+        cpu_pool.shutdown()
+    if app.state.redis is not None:
+        await app.state.redis.aclose()
 
-app = FastAPI(title="StyleSync AI Fashion API", version="1.0.0")
+app = FastAPI(
+    title="StyleSync AI Fashion API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
-# Create uploads directory if it doesn't exist
-uploads_dir = Path("uploads")
-uploads_dir.mkdir(exist_ok=True)
+# Create uploads directory once at startup; the upload routes assume it exists
+clothing.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 # Serve static files (uploaded images)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount("/uploads", StaticFiles(directory=clothing.UPLOAD_DIR), name="uploads")
 
 # CORS middleware for mobile app access
 app.add_middleware(
@@ -45,6 +89,6 @@ async def health_check():
         "service": "StyleSync AI Fashion API",
         "ai_modules": ["vision", "color_analysis", "recommendations"],
         "database": "connected",
-        "uploads_directory": str(uploads_dir.absolute()),
+        "uploads_directory": str(clothing.UPLOAD_DIR.absolute()),
         "version": "1.0.0"
     }
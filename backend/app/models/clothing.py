@@ -1,33 +1,57 @@
 # app/models/clothing.py
-from sqlalchemy import Column, String, DateTime, JSON, ForeignKey, Integer
+from sqlalchemy import Column, String, DateTime, JSON, ForeignKey, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from pgvector.sqlalchemy import Vector
+from sqlalchemy.sql import func
+import os
+import time
 import uuid
 from app.models.user import Base
 
+# Size of the CLIP image embeddings produced by app.ai.vision
+EMBEDDING_DIM = 512
+
+def uuid7() -> uuid.UUID:
+    """Time-ordered UUID (RFC 9562 version 7): 48-bit Unix milliseconds, then random bits
+    
+    New ids land at the right-hand edge of the primary key index instead of
+    on a random page, so inserts don't keep splitting B-tree pages.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | 0x7 << 76  # version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
 class ClothingItem(Base):
     __tablename__ = "clothing_items"
+    __table_args__ = (
+        # Leading user_id also serves plain per-user lookups
+        Index('ix_items_user_cat', 'user_id', 'category'),
+        Index('ix_items_user_last_worn', 'user_id', 'last_worn'),
+    )
     
-    item_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    item_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=False)
     
     # Basic item info
-    category = Column(String(50), nullable=False)
+    category = Column(String(50), nullable=False, index=True)
     subcategory = Column(String(50))
     color = Column(String(50))
     brand = Column(String(100))
     image_url = Column(String(500))
+    image_hash = Column(String(64), index=True)  # BLAKE2b of the uploaded bytes
     
     # AI-generated metadata from your vision.py
     item_metadata = Column(JSON, default={})  # Stores AI analysis results
+    embedding = Column(Vector(EMBEDDING_DIM))  # Image embedding for similarity search
     
     # Usage tracking
     last_worn = Column(DateTime)
     purchase_date = Column(DateTime)
     times_worn = Column(Integer, default=0)
     
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.timezone('UTC', func.now()), nullable=False)
     
     # Relationship
     user = relationship("User", back_populates="clothing_items")
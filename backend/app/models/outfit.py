@@ -1,19 +1,39 @@
 # app/models/outfit.py
-from sqlalchemy import Column, String, DateTime, JSON, ForeignKey, Integer, Float
-from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from sqlalchemy import Column, String, DateTime, JSON, ForeignKey, Integer, Float, Index, Table
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.sql import func
 import uuid
 from app.models.user import Base
 
+# Outfit <-> ClothingItem membership, ordered by position within the outfit
+outfit_items = Table(
+    "outfit_items",
+    Base.metadata,
+    Column("outfit_id", UUID(as_uuid=True), ForeignKey("outfits.outfit_id", ondelete="CASCADE"), primary_key=True),
+    Column("item_id", UUID(as_uuid=True), ForeignKey("clothing_items.item_id", ondelete="CASCADE"), primary_key=True),
+    Column("position", Integer, nullable=False, default=0),
+    # The primary key covers outfit -> items; this covers item -> outfits
+    Index("ix_outfit_items_item_id", "item_id"),
+)
+
 class Outfit(Base):
     __tablename__ = "outfits"
+    __table_args__ = (
+        # Leading user_id also serves plain per-user lookups
+        Index('ix_outfits_user_last_worn', 'user_id', 'last_worn'),
+    )
     
     outfit_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=False)
     
-    # Outfit composition
-    item_ids = Column(ARRAY(UUID), nullable=False)
+    # Outfit composition, loaded with one extra query per batch of outfits
+    items = relationship(
+        "ClothingItem",
+        secondary=outfit_items,
+        order_by=outfit_items.c.position,
+        lazy="selectin"
+    )
     
     # Context information
     occasion = Column(String(100))
@@ -30,7 +50,7 @@ class Outfit(Base):
     user_notes = Column(String(1000))
     
     # Usage tracking
-    date_created = Column(DateTime, default=datetime.utcnow)
+    date_created = Column(DateTime, server_default=func.timezone('UTC', func.now()), nullable=False)
     times_worn = Column(Integer, default=0)
     last_worn = Column(DateTime)
     
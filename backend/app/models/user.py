@@ -3,7 +3,7 @@ from sqlalchemy import Column, String, DateTime, JSON, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.sql import func
 import uuid
 
 Base = declarative_base()
@@ -22,8 +22,9 @@ class User(Base):
     body_measurements = Column(JSON, default={})
     lifestyle_type = Column(String(100))
     
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Naive UTC timestamps generated by the database
+    created_at = Column(DateTime, server_default=func.timezone('UTC', func.now()), nullable=False)
+    updated_at = Column(DateTime, server_default=func.timezone('UTC', func.now()), onupdate=func.timezone('UTC', func.now()))
     
     # Relationships
     clothing_items = relationship("ClothingItem", back_populates="user")
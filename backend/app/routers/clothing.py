@@ -1,104 +1,365 @@
 # app/routers/clothing.py
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request
+from fastapi.responses import ORJSONResponse, Response
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, MultipartState, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session, load_only, raiseload
 from app.database.connection import get_db
 from app.models.clothing import ClothingItem
-from app.ai.vision import ClothingVisionAnalyzer
+from app.ai import vision
 from app.ai.color_analysis import ColorAnalyzer
-import shutil
+from app.dependencies import get_color_analyzer, get_redis
+from app import tasks
+from app.tasks import build_clothing_item, build_clothing_item_values
+import asyncio
+import hashlib
+import logging
+import orjson
 import uuid
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
+# Uploads are written to disk on their own bounded thread pool, one executor
+# hop per file (or per body chunk when streaming), so blocking writes never
+# run on the event loop and burst uploads are limited by the disk, not the CPU
+UPLOAD_POOL = ThreadPoolExecutor(
+    max_workers=min(32, (os.cpu_count() or 1) * 4), thread_name_prefix="upload"
+)
+# Spooled uploads are copied in 16 MiB chunks
+UPLOAD_CHUNK_SIZE = 16 << 20
+# Upload root and the shard directories this process has already created
+UPLOAD_DIR = Path("uploads")
+UPLOAD_SHARDS_CREATED = set()
+# Largest accepted image; bigger uploads are rejected with 413 before or
+# while they are written, and any partial file is removed
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+# Wardrobe listing pages are cached in Redis (when configured) for this many
+# seconds, and dropped as soon as the user uploads something new
+WARDROBE_CACHE_TTL = 60
+
+# Canonical 8-4-4-4-12 spelling, checked before falling back to uuid.UUID
+UUID_RE = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE
+)
+# Namespace for deriving UUIDs from non-UUID user ids
+USER_ID_NAMESPACE = uuid.NAMESPACE_DNS
+
+@lru_cache(maxsize=4096)
 def validate_and_convert_uuid(user_id: str) -> str:
     """Validate and convert user_id to proper UUID format"""
+    if UUID_RE.fullmatch(user_id):
+        return user_id.lower()
+    
+    # Other UUID spellings (no hyphens, braces, urn:uuid:) have at least 32
+    # characters, so shorter ids skip the parse and its exception entirely
+    if len(user_id) >= 32:
+        try:
+            return str(uuid.UUID(user_id))
+        except ValueError:
+            pass
+    
+    # If not a valid UUID, create one based on the string
+    # This allows test strings like "test-user-123" to work
+    return str(uuid.uuid5(USER_ID_NAMESPACE, user_id))
+
+def new_upload_path(filename: Optional[str]) -> Path:
+    """Unique path under the uploads directory, keeping the client's file extension"""
+    # Generate unique filename
+    file_extension = filename.split(".")[-1] if filename else "jpg"
+    name = uuid.uuid4().hex
+    
+    # Shard as uploads/ab/cd/ so no single directory grows huge; UPLOAD_DIR
+    # itself is created at startup and each shard once per process
+    shard_dir = UPLOAD_DIR / name[:2] / name[2:4]
+    if shard_dir not in UPLOAD_SHARDS_CREATED:
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        UPLOAD_SHARDS_CREATED.add(shard_dir)
+    return shard_dir / f"{name}.{file_extension}"
+
+def copy_upload(source, file_path: Path) -> str:
+    """Copy an upload's file object to disk and return its content hash"""
+    hasher = hashlib.blake2b(digest_size=32)
+    written = 0
     try:
-        # Try to parse as UUID
-        uuid_obj = uuid.UUID(user_id)
-        return str(uuid_obj)
-    except ValueError:
-        # If not a valid UUID, create one based on the string
-        # This allows test strings like "test-user-123" to work
-        namespace = uuid.NAMESPACE_DNS
-        generated_uuid = uuid.uuid5(namespace, user_id)
-        return str(generated_uuid)
-
-async def save_uploaded_image(file: UploadFile) -> str:
-    """Save uploaded image file and return the file path"""
+        with open(file_path, "wb") as buffer:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail=f"File exceeds {MAX_UPLOAD_BYTES} bytes")
+                hasher.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        # Never leave a truncated image behind
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return hasher.hexdigest()
+
+async def save_uploaded_image(file: UploadFile) -> Tuple[str, str]:
+    """Save uploaded image file and return the file path and content hash"""
     try:
-        # Create uploads directory if it doesn't exist
-        upload_dir = Path("uploads")
-        upload_dir.mkdir(exist_ok=True)
+        file_path = new_upload_path(file.filename)
         
-        # Generate unique filename
-        file_extension = file.filename.split(".")[-1] if file.filename else "jpg"
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = upload_dir / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Save file, hashing it on the way through
+        image_hash = await asyncio.get_running_loop().run_in_executor(
+            UPLOAD_POOL, copy_upload, file.file, file_path
+        )
         
         # Return relative path
-        return str(file_path)
+        return str(file_path), image_hash
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"File save failed: {str(e)}")
+
+async def stream_uploaded_image(request: Request) -> Tuple[str, str, Optional[str]]:
+    """Copy the "file" part of a multipart request body straight to disk
+    
+    Returns the file path, content hash and the client's filename. Unlike
+    UploadFile, the body is never spooled to a temporary file first.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Upload must be multipart/form-data")
+    
+    # Refuse oversized bodies up front when the client declares their size
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+    
+    # Parser callbacks only record what they see; the async writes happen
+    # between body chunks
+    part = {}
+    upload = {}
+    header_field = bytearray()
+    header_value = bytearray()
+    pending = []
+    
+    def on_part_begin():
+        part.clear()
+        part["headers"] = {}
+    
+    def on_header_field(data, start, end):
+        header_field.extend(data[start:end])
+    
+    def on_header_value(data, start, end):
+        header_value.extend(data[start:end])
+    
+    def on_header_end():
+        part["headers"][bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+    
+    def on_headers_finished():
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        # Only the first file part named "file" is kept
+        if upload or disposition.get(b"name") != b"file" or b"filename" not in disposition:
+            return
+        part["is_file"] = True
+        upload["filename"] = disposition[b"filename"].decode("utf-8", "replace")
+        upload["content_type"] = part["headers"].get(b"content-type", b"").decode("latin-1")
+    
+    def on_part_data(data, start, end):
+        if part.get("is_file"):
+            pending.append(data[start:end])
+    
+    try:
+        parser = MultipartParser(boundary, {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data
+        })
+    except FormParserError:
+        raise HTTPException(status_code=400, detail="Malformed multipart boundary")
+    
+    loop = asyncio.get_running_loop()
+    buffer = None
+    file_path = None
+    hasher = hashlib.blake2b(digest_size=32)
+    received = 0
+    completed = False
+    try:
+        async for chunk in request.stream():
+            # Chunked or mis-declared bodies are capped as they arrive
+            received += len(chunk)
+            if received > MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail=f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+            parser.write(chunk)
+            if upload and buffer is None:
+                # Validate file type before anything is written
+                if not upload["content_type"].startswith("image/"):
+                    raise HTTPException(status_code=400, detail="File must be an image")
+                file_path = new_upload_path(upload["filename"])
+                buffer = await loop.run_in_executor(UPLOAD_POOL, open, file_path, "wb")
+            if pending:
+                for data in pending:
+                    hasher.update(data)
+                await loop.run_in_executor(UPLOAD_POOL, buffer.writelines, pending)
+                pending.clear()
+        parser.finalize()
+        # A body cut off before the closing boundary is as malformed as a
+        # garbled one
+        if parser.state != MultipartState.END:
+            raise HTTPException(status_code=400, detail="Malformed multipart body")
+        completed = True
+    except HTTPException:
+        raise
+    except FormParserError:
+        raise HTTPException(status_code=400, detail="Malformed multipart body")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"File save failed: {str(e)}")
+    finally:
+        if buffer is not None:
+            await loop.run_in_executor(UPLOAD_POOL, buffer.close)
+            # Never leave a truncated image behind
+            if not completed:
+                await loop.run_in_executor(UPLOAD_POOL, os.remove, file_path)
+    
+    if file_path is None:
+        raise HTTPException(status_code=422, detail="No image file in the upload")
+    
+    # Return relative path
+    return str(file_path), hasher.hexdigest(), upload["filename"]
 
-@router.post("/upload")
+# Analyses produced when classification failed; never reused
+FALLBACK_CLASSIFICATION_METHODS = frozenset({'fallback', 'error_fallback'})
+
+def find_prior_analyses(
+    db: Session, valid_user_id: str, image_hashes: List[str]
+) -> Dict[str, Tuple[str, dict]]:
+    """(image_url, ai_analysis) of the user's earlier upload of the same bytes, keyed by image hash"""
+    # Scoped to the uploader, so a stored file is only ever shared between
+    # items of the same wardrobe
+    rows = (
+        db.query(
+            ClothingItem.image_hash, ClothingItem.image_url,
+            ClothingItem.item_metadata, ClothingItem.embedding
+        )
+        .filter(
+            ClothingItem.user_id == valid_user_id,
+            ClothingItem.image_hash.in_(set(image_hashes))
+        )
+        .all()
+    )
+    priors = {}
+    for image_hash, image_url, metadata, embedding in rows:
+        ai_analysis = metadata.get('ai_analysis') if metadata else None
+        if not ai_analysis or ai_analysis.get('classification_method') in FALLBACK_CLASSIFICATION_METHODS:
+            continue
+        priors[image_hash] = (image_url, {**ai_analysis, 'embedding': embedding})
+    return priors
+
+def save_clothing_item(db: Session, clothing_item: ClothingItem) -> ClothingItem:
+    """Insert one item and commit, returning it refreshed with its database defaults"""
+    db.add(clothing_item)
+    db.commit()
+    db.refresh(clothing_item)
+    return clothing_item
+
+def insert_clothing_items(db: Session, rows: List[dict]) -> List[uuid.UUID]:
+    """One multi-row INSERT ... RETURNING for a batch of items, in a single transaction"""
+    item_ids = db.scalars(
+        insert(ClothingItem).returning(ClothingItem.item_id, sort_by_parameter_order=True),
+        rows
+    ).all()
+    db.commit()
+    return item_ids
+
+def reuse_stored_image(new_path: str, stored_path: str) -> str:
+    """Drop a duplicate upload in favor of the identical file already on disk"""
+    if stored_path and stored_path != new_path and os.path.exists(stored_path):
+        os.remove(new_path)
+        return stored_path
+    return new_path
+
+def wardrobe_cache_index(valid_user_id: str) -> str:
+    """Redis set holding the keys of every cached listing page for a user"""
+    return f"clothing:{valid_user_id}:keys"
+
+async def invalidate_wardrobe_cache(redis, valid_user_id: str):
+    """Drop every cached listing page for a user; a Redis outage never fails the caller"""
+    if redis is None:
+        return
+    index = wardrobe_cache_index(valid_user_id)
+    try:
+        keys = await redis.smembers(index)
+        await redis.delete(index, *keys)
+    except Exception as e:
+        logger.warning(f"Could not invalidate wardrobe cache for {valid_user_id}: {e}")
+
+async def run_vision_task(request: Request, func, *args):
+    """Run a CPU-bound vision entry point off the event loop, in the app's process pool if it has one"""
+    cpu_pool = getattr(request.app.state, "cpu_pool", None)
+    if cpu_pool is None:
+        return await run_in_threadpool(func, *args)
+    return await asyncio.get_running_loop().run_in_executor(cpu_pool, func, *args)
+
+# /upload reads its multipart body itself, so the file field is described
+# here for the OpenAPI schema instead of as an UploadFile parameter
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}}
+                }
+            }
+        }
+    }
+}
+
+@router.post("/upload", openapi_extra=UPLOAD_REQUEST_BODY)
 async def upload_clothing_item(
-    file: UploadFile = File(...),
+    request: Request,
     user_id: str = Query(..., description="User ID (can be string or UUID)"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    color_analyzer: ColorAnalyzer = Depends(get_color_analyzer),
+    redis = Depends(get_redis)
 ):
     """Upload and analyze clothing item using AI modules"""
     try:
-        # Validate file type
-        if not file.content_type.startswith("image/"):
-            raise HTTPException(status_code=400, detail="File must be an image")
-        
         # Convert user_id to valid UUID
         valid_user_id = validate_and_convert_uuid(user_id)
         
-        # Save uploaded image
-        image_path = await save_uploaded_image(file)
-        
-        # Initialize AI analyzers
-        vision_analyzer = ClothingVisionAnalyzer()
-        color_analyzer = ColorAnalyzer()
+        # Save uploaded image, validating its type from the part headers
+        image_path, image_hash, filename = await stream_uploaded_image(request)
         
-        # Analyze image with AI
-        ai_analysis = vision_analyzer.analyze_clothing_image(image_path)
-        
-        # Create clothing items list for color analysis
-        clothing_items = [{
-            'metadata': {'dominant_colors': ai_analysis.get('dominant_colors', ['gray'])}
-        }]
-        color_analysis = color_analyzer.analyze_color_palette(clothing_items)
+        # Analyze image with AI, unless the same photo was analyzed before
+        # Database calls are blocking, so they run on the threadpool
+        priors = await run_in_threadpool(find_prior_analyses, db, valid_user_id, [image_hash])
+        prior = priors.get(image_hash)
+        if prior is not None:
+            image_path = reuse_stored_image(image_path, prior[0])
+            ai_analysis = prior[1]
+        else:
+            ai_analysis = await run_vision_task(request, vision.analyze, image_path)
         
         # Create clothing item with AI metadata
-        clothing_item = ClothingItem(
-            user_id=valid_user_id,  # Use the validated UUID
-            category=ai_analysis.get('category', 'unknown'),
-            subcategory=ai_analysis.get('subcategory', 'general'),
-            color=ai_analysis.get('dominant_colors', ['gray'])[0],
-            image_url=image_path,
-            metadata={
-                'ai_analysis': ai_analysis,
-                'color_analysis': color_analysis,
-                'original_filename': file.filename,
-                'original_user_id': user_id,  # Keep original for reference
-                'converted_user_id': valid_user_id
-            }
+        clothing_item, color_analysis = build_clothing_item(
+            color_analyzer, ai_analysis, image_path, filename, user_id, valid_user_id, image_hash
         )
         
         # Save to database
-        db.add(clothing_item)
-        db.commit()
-        db.refresh(clothing_item)
+        await run_in_threadpool(save_clothing_item, db, clothing_item)
+        await invalidate_wardrobe_cache(redis, valid_user_id)
         
         return {
             "success": True,
@@ -114,35 +375,270 @@ async def upload_clothing_item(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
-@router.get("/user/{user_id}/items")
-async def get_user_clothing(user_id: str, db: Session = Depends(get_db)):
-    """Get user's clothing catalog"""
+@router.post("/upload/batch")
+async def upload_clothing_items(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    user_id: str = Query(..., description="User ID (can be string or UUID)"),
+    db: Session = Depends(get_db),
+    color_analyzer: ColorAnalyzer = Depends(get_color_analyzer),
+    redis = Depends(get_redis)
+):
+    """Upload and analyze several clothing items, classifying all images in one batch"""
     try:
+        # Validate file types before saving anything
+        for file in files:
+            if not file.content_type.startswith("image/"):
+                raise HTTPException(status_code=400, detail=f"File {file.filename} must be an image")
+        
         # Convert user_id to valid UUID
         valid_user_id = validate_and_convert_uuid(user_id)
         
-        items = db.query(ClothingItem).filter(ClothingItem.user_id == valid_user_id).all()
+        # Save uploaded images concurrently; if any fails, remove the ones
+        # that were written before reporting the error
+        saved = await asyncio.gather(
+            *(save_uploaded_image(file) for file in files), return_exceptions=True
+        )
+        errors = [result for result in saved if isinstance(result, BaseException)]
+        if errors:
+            for result in saved:
+                if not isinstance(result, BaseException):
+                    os.remove(result[0])
+            raise errors[0]
+        image_paths = [image_path for image_path, _ in saved]
+        image_hashes = [image_hash for _, image_hash in saved]
+        
+        # Reuse analyses of photos uploaded before
+        priors = await run_in_threadpool(find_prior_analyses, db, valid_user_id, image_hashes)
+        ai_analyses = [None] * len(files)
+        for i, image_hash in enumerate(image_hashes):
+            if image_hash in priors:
+                image_paths[i] = reuse_stored_image(image_paths[i], priors[image_hash][0])
+                # Copied, since duplicates within the batch share one prior
+                ai_analyses[i] = dict(priors[image_hash][1])
+        
+        # Analyze the remaining images with AI in one batch
+        pending = [i for i, ai_analysis in enumerate(ai_analyses) if ai_analysis is None]
+        if pending:
+            analyzed = await run_vision_task(request, vision.analyze_batch, [image_paths[i] for i in pending])
+            for i, ai_analysis in zip(pending, analyzed):
+                ai_analyses[i] = ai_analysis
+        
+        rows = []
+        color_analyses = []
+        for file, image_path, image_hash, ai_analysis in zip(files, image_paths, image_hashes, ai_analyses):
+            values, color_analysis = build_clothing_item_values(
+                color_analyzer, ai_analysis, image_path, file.filename, user_id, valid_user_id, image_hash
+            )
+            rows.append(values)
+            color_analyses.append(color_analysis)
+        
+        item_ids = await run_in_threadpool(insert_clothing_items, db, rows)
+        await invalidate_wardrobe_cache(redis, valid_user_id)
+        
+        items = [
+            {
+                "item_id": str(item_id),
+                "ai_analysis": ai_analysis,
+                "color_analysis": color_analysis,
+                "image_path": image_path
+            }
+            for item_id, ai_analysis, color_analysis, image_path
+            in zip(item_ids, ai_analyses, color_analyses, image_paths)
+        ]
+        
         return {
             "success": True,
+            "message": f"{len(items)} clothing items analyzed and saved successfully",
             "user_id": valid_user_id,
             "original_user_id": user_id,
-            "items": [
-                {
-                    "item_id": str(item.item_id),
-                    "category": item.category,
-                    "subcategory": item.subcategory,
-                    "color": item.color,
-                    "brand": item.brand,
-                    "image_url": item.image_url,
-                    "metadata": item.metadata,
-                    "created_at": item.created_at.isoformat()
-                }
-                for item in items
-            ],
+            "items": items,
             "total": len(items)
         }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=500, detail=f"Batch upload failed: {str(e)}")
+
+@router.post("/upload/async")
+async def upload_clothing_item_async(
+    file: UploadFile = File(...),
+    user_id: str = Query(..., description="User ID (can be string or UUID)")
+):
+    """Save an upload and queue its analysis; poll /upload/status/{job_id} for the result"""
+    if tasks.celery_app is None:
+        raise HTTPException(status_code=503, detail="Background analysis queue is not configured")
+    
+    # Validate file type
+    if not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File must be an image")
+    
+    # Convert user_id to valid UUID
+    valid_user_id = validate_and_convert_uuid(user_id)
+    
+    # Save uploaded image
+    image_path, image_hash = await save_uploaded_image(file)
+    
+    try:
+        job = tasks.analyze_and_persist_task.delay(image_path, file.filename, user_id, valid_user_id, image_hash)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Failed to queue analysis: {str(e)}")
+    
+    return {
+        "success": True,
+        "message": "Clothing item queued for analysis",
+        "job_id": job.id,
+        "user_id": valid_user_id,
+        "original_user_id": user_id,
+        "image_path": image_path
+    }
+
+@router.get("/upload/status/{job_id}")
+async def get_upload_status(job_id: str):
+    """Status of a queued analysis job, with its result once finished"""
+    if tasks.celery_app is None:
+        raise HTTPException(status_code=503, detail="Background analysis queue is not configured")
+    
+    job = tasks.get_job(job_id)
+    status = {"job_id": job_id, "status": job.state.lower()}
+    if job.successful():
+        status["result"] = job.result
+    elif job.failed():
+        status["error"] = str(job.result)
+    return status
+
+def load_wardrobe_page(db: Session, user_id: str, valid_user_id: str, limit: int, offset: int) -> dict:
+    """One page of a user's clothing catalog, newest first, as a response payload"""
+    # Listing columns only; the metadata blob is served by /items/{item_id}.
+    # raiseload turns any relationship access in the loop into an error
+    # instead of a silent per-row query
+    items = db.scalars(
+        select(ClothingItem)
+        .options(load_only(
+            ClothingItem.item_id, ClothingItem.category, ClothingItem.subcategory,
+            ClothingItem.color, ClothingItem.brand, ClothingItem.image_url,
+            ClothingItem.created_at
+        ), raiseload("*"))
+        .where(ClothingItem.user_id == valid_user_id)
+        .order_by(ClothingItem.created_at.desc())
+        .limit(limit)
+        .offset(offset)
+    ).all()
+    
+    # A short first page already holds the whole wardrobe; otherwise count
+    # in the database (index-only via ix_items_user_cat)
+    if offset == 0 and len(items) < limit:
+        total = len(items)
+    else:
+        total = db.scalar(
+            select(func.count())
+            .select_from(ClothingItem)
+            .where(ClothingItem.user_id == valid_user_id)
+        )
+    
+    # Plain data: orjson encodes the datetimes itself
+    return {
+        "success": True,
+        "user_id": valid_user_id,
+        "original_user_id": user_id,
+        "items": [
+            {
+                "item_id": str(item.item_id),
+                "category": item.category,
+                "subcategory": item.subcategory,
+                "color": item.color,
+                "brand": item.brand,
+                "image_url": item.image_url,
+                "created_at": item.created_at
+            }
+            for item in items
+        ],
+        "total": total,
+        "limit": limit,
+        "offset": offset
+    }
+
+@router.get("/user/{user_id}/items")
+async def get_user_clothing(
+    request: Request,
+    user_id: str,
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of items to return"),
+    offset: int = Query(0, ge=0, description="Number of items to skip"),
+    db: Session = Depends(get_db),
+    redis = Depends(get_redis)
+):
+    """Get a page of the user's clothing catalog, newest first (without AI metadata)"""
+    try:
+        # Convert user_id to valid UUID
+        valid_user_id = validate_and_convert_uuid(user_id)
+        
+        # The response echoes the caller's spelling of user_id, so it's part of the key
+        cache_key = f"clothing:{valid_user_id}:{limit}:{offset}:{user_id}"
+        body = None
+        if redis is not None:
+            try:
+                body = await redis.get(cache_key)
+            except Exception as e:
+                logger.warning(f"Wardrobe cache read failed: {e}")
+        
+        if body is None:
+            # The page query and COUNT are blocking, so they run on the threadpool
+            page = await run_in_threadpool(load_wardrobe_page, db, user_id, valid_user_id, limit, offset)
+            body = orjson.dumps(page)
+            if redis is not None:
+                index = wardrobe_cache_index(valid_user_id)
+                try:
+                    async with redis.pipeline(transaction=True) as pipe:
+                        pipe.setex(cache_key, WARDROBE_CACHE_TTL, body)
+                        pipe.sadd(index, cache_key)
+                        pipe.expire(index, WARDROBE_CACHE_TTL)
+                        await pipe.execute()
+                except Exception as e:
+                    logger.warning(f"Wardrobe cache write failed: {e}")
+        
+        # Clients revalidating an unchanged page get an empty 304
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch items: {str(e)}")
+
+@router.get("/items/{item_id}")
+def get_clothing_item(item_id: str, db: Session = Depends(get_db)):
+    """Get one clothing item with its full AI metadata"""
+    try:
+        item_uuid = uuid.UUID(item_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Clothing item not found")
+    
+    try:
+        item = db.query(ClothingItem).filter(ClothingItem.item_id == item_uuid).first()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch item: {str(e)}")
+    if item is None:
+        raise HTTPException(status_code=404, detail="Clothing item not found")
+    
+    return ORJSONResponse({
+        "success": True,
+        "item": {
+            "item_id": str(item.item_id),
+            "user_id": str(item.user_id),
+            "category": item.category,
+            "subcategory": item.subcategory,
+            "color": item.color,
+            "brand": item.brand,
+            "image_url": item.image_url,
+            "metadata": item.item_metadata,
+            "last_worn": item.last_worn,
+            "purchase_date": item.purchase_date,
+            "times_worn": item.times_worn,
+            "created_at": item.created_at
+        }
+    })
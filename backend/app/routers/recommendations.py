@@ -1,15 +1,18 @@
 # app/routers/recommendations.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.database.connection import get_db
 from app.ai.recommendations import OutfitRecommendationEngine
+from app.dependencies import get_recommendation_engine
+import uuid
 
 router = APIRouter()
 
 @router.post("/generate")
 async def generate_outfit_recommendations(
     request_data: dict,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    recommendation_engine: OutfitRecommendationEngine = Depends(get_recommendation_engine)
 ):
     """Generate outfit recommendations using your AI engine"""
     try:
@@ -20,7 +23,6 @@ async def generate_outfit_recommendations(
         weather = request_data.get('weather', {})
         
         # Use your recommendation engine
-        recommendation_engine = OutfitRecommendationEngine()
         recommendations = recommendation_engine.generate_outfit_recommendations(
             user_id=user_id,
             mood=mood,
@@ -33,3 +35,25 @@ async def generate_outfit_recommendations(
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Recommendation failed: {str(e)}")
+
+@router.get("/similar/{item_id}")
+def get_similar_items(
+    item_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    recommendation_engine: OutfitRecommendationEngine = Depends(get_recommendation_engine)
+):
+    """Find the items in the same wardrobe that look most like this one"""
+    try:
+        item_uuid = uuid.UUID(item_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Clothing item not found")
+    
+    try:
+        similar_items = recommendation_engine.find_similar_items(item_uuid, db, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Similarity search failed: {str(e)}")
+    if similar_items is None:
+        raise HTTPException(status_code=404, detail="Clothing item not found or has no embedding")
+    
+    return {"item_id": item_id, "similar_items": similar_items}
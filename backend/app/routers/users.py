@@ -1,13 +1,21 @@
 # app/routers/users.py
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from app.database.connection import get_db
+from app.database.connection import SessionLocal, get_db
 from app.models.user import User
 from app.utils.security import get_password_hash
+import orjson
 import uuid
 
 router = APIRouter()
 
+# list_users streams rows from the database in batches of this size
+USER_STREAM_BATCH_SIZE = 500
+
 @router.post("/create-test-user")
 async def create_test_user(
     email: str = "test@stylesync.com",
@@ -16,61 +24,81 @@ async def create_test_user(
 ):
     """Create a test user for development"""
     try:
-        # Check if user already exists
-        existing_user = db.query(User).filter(User.email == email).first()
-        if existing_user:
+        # bcrypt is deliberately slow; hash on a worker thread so the event
+        # loop keeps serving other requests
+        hashed_password = await run_in_threadpool(get_password_hash, "testpassword123")
+        
+        # Insert unless the email is taken, in one round trip and without a
+        # check-then-insert race (users.email is unique)
+        stmt = (
+            pg_insert(User)
+            .values(
+                email=email,
+                hashed_password=hashed_password,
+                full_name=name,
+                style_preferences={
+                    "preferred_colors": ["blue", "black", "white"],
+                    "style_type": "casual",
+                    "formality_preference": 2
+                }
+            )
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.user_id)
+        )
+        user_id = db.execute(stmt).scalar_one_or_none()
+        
+        if user_id is None:
+            # User already exists
+            existing_user_id = db.query(User.user_id).filter(User.email == email).scalar()
             return {
                 "success": True,
                 "message": "Test user already exists",
-                "user_id": str(existing_user.user_id),
-                "email": existing_user.email
+                "user_id": str(existing_user_id),
+                "email": email
             }
         
-        # Create new test user
-        test_user = User(
-            email=email,
-            hashed_password=get_password_hash("testpassword123"),
-            full_name=name,
-            style_preferences={
-                "preferred_colors": ["blue", "black", "white"],
-                "style_type": "casual",
-                "formality_preference": 2
-            }
-        )
-        
-        db.add(test_user)
         db.commit()
-        db.refresh(test_user)
         
         return {
             "success": True,
             "message": "Test user created successfully",
-            "user_id": str(test_user.user_id),
-            "email": test_user.email,
-            "name": test_user.full_name
+            "user_id": str(user_id),
+            "email": email,
+            "name": name
         }
         
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"User creation failed: {str(e)}")
 
+def stream_users():
+    """Serialize every user as one JSON document, a batch of rows at a time"""
+    # Own session rather than get_db: the request's dependencies may be torn
+    # down before a streamed body has been sent
+    with SessionLocal() as db:
+        result = db.execute(
+            select(User.user_id, User.email, User.full_name, User.created_at)
+            .execution_options(yield_per=USER_STREAM_BATCH_SIZE)
+        )
+        
+        yield b'{"success":true,"users":['
+        total = 0
+        for rows in result.partitions():
+            chunk = b",".join(
+                orjson.dumps({
+                    "user_id": str(user_id),
+                    "email": email,
+                    "full_name": full_name,
+                    "created_at": created_at
+                })
+                for user_id, email, full_name, created_at in rows
+            )
+            yield (b"," if total else b"") + chunk
+            total += len(rows)
+        yield b'],"total":%d}' % total
+
 @router.get("/users")
-async def list_users(db: Session = Depends(get_db)):
+async def list_users():
     """List all users for testing"""
-    try:
-        users = db.query(User).all()
-        return {
-            "success": True,
-            "users": [
-                {
-                    "user_id": str(user.user_id),
-                    "email": user.email,
-                    "full_name": user.full_name,
-                    "created_at": user.created_at.isoformat()
-                }
-                for user in users
-            ],
-            "total": len(users)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch users: {str(e)}")
+    # Rows are fetched and sent in batches, so memory stays flat however many users exist
+    return StreamingResponse(stream_users(), media_type="application/json")
@@ -0,0 +1,126 @@
+# app/tasks.py
+import logging
+import os
+from typing import Optional
+from app.ai import vision
+from app.ai.color_analysis import ColorAnalyzer
+from app.database.connection import SessionLocal
+from app.dependencies import get_color_analyzer
+from app.models.clothing import ClothingItem
+
+# Try to import Celery for the background classification queue
+try:
+    from celery import Celery
+    from celery.result import AsyncResult
+    CELERY_AVAILABLE = True
+except ImportError:
+    CELERY_AVAILABLE = False
+    logging.warning("Celery not available. Install with: pip install celery[redis]")
+
+logger = logging.getLogger(__name__)
+
+# Image analysis runs on workers consuming this queue, e.g. GPU hosts started with
+#   celery -A app.tasks.celery_app worker -Q classification
+CLASSIFICATION_QUEUE = "classification"
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL")
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", CELERY_BROKER_URL)
+
+def build_clothing_item_values(
+    color_analyzer: ColorAnalyzer,
+    ai_analysis: dict,
+    image_path: str,
+    original_filename: Optional[str],
+    user_id: str,
+    valid_user_id: str,
+    image_hash: Optional[str] = None
+):
+    """Run color analysis on an analyzed image and build its ClothingItem column values
+    
+    The image embedding is moved out of ai_analysis into its own column rather
+    than being stored (and returned) with the rest of the analysis.
+    """
+    embedding = ai_analysis.pop('embedding', None)
+    
+    # Create clothing items list for color analysis
+    clothing_items = [{
+        'metadata': {'dominant_colors': ai_analysis.get('dominant_colors', ['gray'])}
+    }]
+    color_analysis = color_analyzer.analyze_color_palette(clothing_items)
+
+    values = {
+        'user_id': valid_user_id,  # Use the validated UUID
+        'category': ai_analysis.get('category', 'unknown'),
+        'subcategory': ai_analysis.get('subcategory', 'general'),
+        'color': ai_analysis.get('dominant_colors', ['gray'])[0],
+        'image_url': image_path,
+        'image_hash': image_hash,
+        'embedding': embedding,
+        'item_metadata': {
+            'ai_analysis': ai_analysis,
+            'color_analysis': color_analysis,
+            'original_filename': original_filename,
+            'original_user_id': user_id,  # Keep original for reference
+            'converted_user_id': valid_user_id
+        }
+    }
+    return values, color_analysis
+
+def build_clothing_item(
+    color_analyzer: ColorAnalyzer,
+    ai_analysis: dict,
+    image_path: str,
+    original_filename: Optional[str],
+    user_id: str,
+    valid_user_id: str,
+    image_hash: Optional[str] = None
+):
+    """Run color analysis on an analyzed image and build its ClothingItem"""
+    values, color_analysis = build_clothing_item_values(
+        color_analyzer, ai_analysis, image_path, original_filename, user_id, valid_user_id, image_hash
+    )
+    return ClothingItem(**values), color_analysis
+
+def analyze_and_persist(
+    image_path: str,
+    original_filename: Optional[str],
+    user_id: str,
+    valid_user_id: str,
+    image_hash: Optional[str] = None
+) -> dict:
+    """Analyze a saved upload and store it as a ClothingItem, outside any request"""
+    ai_analysis = vision.analyze(image_path)
+    clothing_item, color_analysis = build_clothing_item(
+        get_color_analyzer(), ai_analysis, image_path, original_filename, user_id, valid_user_id, image_hash
+    )
+
+    db = SessionLocal()
+    try:
+        db.add(clothing_item)
+        db.commit()
+        return {
+            "item_id": str(clothing_item.item_id),
+            "user_id": valid_user_id,
+            "original_user_id": user_id,
+            "ai_analysis": ai_analysis,
+            "color_analysis": color_analysis,
+            "image_path": image_path
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+# The queue is only wired up when Celery is installed and a broker is configured
+celery_app = None
+analyze_and_persist_task = None
+if CELERY_AVAILABLE and CELERY_BROKER_URL:
+    celery_app = Celery("stylesync", broker=CELERY_BROKER_URL, backend=CELERY_RESULT_BACKEND)
+    celery_app.conf.task_routes = {
+        "stylesync.analyze_and_persist": {"queue": CLASSIFICATION_QUEUE}
+    }
+    analyze_and_persist_task = celery_app.task(name="stylesync.analyze_and_persist")(analyze_and_persist)
+
+def get_job(job_id: str) -> "AsyncResult":
+    """Celery result handle for a queued analysis job"""
+    return AsyncResult(job_id, app=celery_app)
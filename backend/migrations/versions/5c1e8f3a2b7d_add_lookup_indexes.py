@@ -0,0 +1,34 @@
+"""Add lookup indexes on clothing items and outfits
+
+Revision ID: 5c1e8f3a2b7d
+Revises: 09a55ed774c4
+Create Date: 2026-10-15 10:12:31.218406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e8f3a2b7d'
+down_revision: Union[str, Sequence[str], None] = '09a55ed774c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_clothing_items_category'), 'clothing_items', ['category'], unique=False)
+    op.create_index('ix_items_user_cat', 'clothing_items', ['user_id', 'category'], unique=False)
+    op.create_index('ix_items_user_last_worn', 'clothing_items', ['user_id', 'last_worn'], unique=False)
+    op.create_index('ix_outfits_user_last_worn', 'outfits', ['user_id', 'last_worn'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outfits_user_last_worn', table_name='outfits')
+    op.drop_index('ix_items_user_last_worn', table_name='clothing_items')
+    op.drop_index('ix_items_user_cat', table_name='clothing_items')
+    op.drop_index(op.f('ix_clothing_items_category'), table_name='clothing_items')
@@ -0,0 +1,62 @@
+"""Replace outfits.item_ids array with outfit_items join table
+
+Revision ID: 8d2f4a6c1e9b
+Revises: 5c1e8f3a2b7d
+Create Date: 2026-10-15 11:03:47.552190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f4a6c1e9b'
+down_revision: Union[str, Sequence[str], None] = '5c1e8f3a2b7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outfit_items',
+    sa.Column('outfit_id', sa.UUID(), nullable=False),
+    sa.Column('item_id', sa.UUID(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['clothing_items.item_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['outfit_id'], ['outfits.outfit_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('outfit_id', 'item_id')
+    )
+    op.create_index('ix_outfit_items_item_id', 'outfit_items', ['item_id'], unique=False)
+
+    # Copy array contents, keeping array order; the old column had no
+    # foreign key, so skip ids of items that no longer exist
+    op.execute("""
+        INSERT INTO outfit_items (outfit_id, item_id, position)
+        SELECT o.outfit_id, e.item_id, e.ord - 1
+        FROM outfits o
+        CROSS JOIN LATERAL unnest(o.item_ids) WITH ORDINALITY AS e(item_id, ord)
+        JOIN clothing_items c ON c.item_id = e.item_id
+        ON CONFLICT (outfit_id, item_id) DO NOTHING
+    """)
+
+    op.drop_column('outfits', 'item_ids')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('outfits', sa.Column('item_ids', postgresql.ARRAY(sa.UUID()), nullable=True))
+    op.execute("""
+        UPDATE outfits o
+        SET item_ids = COALESCE(
+            (SELECT array_agg(oi.item_id ORDER BY oi.position)
+             FROM outfit_items oi
+             WHERE oi.outfit_id = o.outfit_id),
+            '{}'
+        )
+    """)
+    op.alter_column('outfits', 'item_ids', nullable=False)
+
+    op.drop_index('ix_outfit_items_item_id', table_name='outfit_items')
+    op.drop_table('outfit_items')
@@ -0,0 +1,52 @@
+"""Use server-side timestamp defaults
+
+Revision ID: b3e7c9d2f4a1
+Revises: 8d2f4a6c1e9b
+Create Date: 2026-10-15 12:41:09.873315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e7c9d2f4a1'
+down_revision: Union[str, Sequence[str], None] = '8d2f4a6c1e9b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UTC_NOW = sa.text("timezone('UTC', now())")
+
+# (table, column, not null) for every database-generated timestamp
+TIMESTAMP_COLUMNS = [
+    ('users', 'created_at', True),
+    ('users', 'updated_at', False),
+    ('clothing_items', 'created_at', True),
+    ('outfits', 'date_created', True),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column, not_null in TIMESTAMP_COLUMNS:
+        if not_null:
+            op.execute(f"UPDATE {table} SET {column} = timezone('UTC', now()) WHERE {column} IS NULL")
+        op.alter_column(
+            table, column,
+            existing_type=sa.DateTime(),
+            server_default=UTC_NOW,
+            nullable=False if not_null else True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column, _ in TIMESTAMP_COLUMNS:
+        op.alter_column(
+            table, column,
+            existing_type=sa.DateTime(),
+            server_default=None,
+            nullable=True
+        )
@@ -0,0 +1,30 @@
+"""Add image_hash to clothing items
+
+Revision ID: e41a7b9c3d58
+Revises: b3e7c9d2f4a1
+Create Date: 2026-10-15 14:26:53.104772
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41a7b9c3d58'
+down_revision: Union[str, Sequence[str], None] = 'b3e7c9d2f4a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('clothing_items', sa.Column('image_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_clothing_items_image_hash'), 'clothing_items', ['image_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_clothing_items_image_hash'), table_name='clothing_items')
+    op.drop_column('clothing_items', 'image_hash')
@@ -0,0 +1,30 @@
+"""Add pgvector image embeddings to clothing items
+
+Revision ID: f7c2d9e4b6a0
+Revises: e41a7b9c3d58
+Create Date: 2026-10-15 16:02:37.418205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7c2d9e4b6a0'
+down_revision: Union[str, Sequence[str], None] = 'e41a7b9c3d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS vector')
+    op.add_column('clothing_items', sa.Column('embedding', Vector(512), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('clothing_items', 'embedding')